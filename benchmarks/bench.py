@@ -0,0 +1,294 @@
+"""Offline benchmark for the Reverso TTS integration.
+
+Avvia il server finto di ``mock_reverso.py`` e un'istanza di Home Assistant
+in una cartella temporanea, poi misura client, entità TTS e servizio
+``reversotts.say`` con carichi tipici: cache fredda, cache calda (RAM e
+disco), broadcast su più speaker, testi lunghi e streaming. Per ogni carico
+riporta throughput, latenza p50/p99, chiamate a Reverso e memoria.
+
+Richiede Home Assistant installato (lo stesso ambiente di sviluppo
+dell'integrazione). Dalla radice del repository::
+
+    python benchmarks/bench.py --messages 200 --latency 0.3 --error-rate 0.02
+    python benchmarks/bench.py --no-rate-limit --json results.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from homeassistant.core import HomeAssistant, ServiceCall  # noqa: E402
+
+from custom_components.reversotts import async_setup  # noqa: E402
+from custom_components.reversotts import tts as reverso_tts  # noqa: E402
+from custom_components.reversotts.const import DOMAIN  # noqa: E402
+from mock_reverso import MockReverso, MockSettings, add_arguments  # noqa: E402
+
+VOICE_ID = "Vittorio22k_NT"
+LANGUAGE = "it-IT"
+
+_LONG_TEXT = (
+    "Buongiorno. Oggi il cielo sarà nuvoloso al mattino, con schiarite nel "
+    "pomeriggio e temperature in lieve aumento. La lavatrice ha terminato il "
+    "ciclo e la lavastoviglie partirà alle ventidue. Ricorda di chiudere le "
+    "finestre del piano superiore prima di uscire, perché in serata sono "
+    "previsti rovesci sparsi. "
+) * 4
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Bench:
+    """Esegue i carichi e raccoglie i risultati."""
+
+    def __init__(self, hass: HomeAssistant, client, entity, server: MockReverso, args) -> None:
+        self.hass = hass
+        self.client = client
+        self.entity = entity
+        self.server = server
+        self.args = args
+        self.results: List[Dict[str, Any]] = []
+
+    async def run(
+        self,
+        name: str,
+        operations: List[Callable[[], Awaitable[Any]]],
+        concurrency: Optional[int] = None,
+    ) -> None:
+        """Esegue le operazioni con concorrenza limitata e registra le misure."""
+        semaphore = asyncio.Semaphore(concurrency or self.args.concurrency)
+        latencies: List[float] = []
+        failures = 0
+        upstream_before = self.server.requests
+
+        async def _timed(operation) -> None:
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                result = await operation()
+                latencies.append(time.perf_counter() - started)
+                if not result:
+                    failures += 1
+
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        await asyncio.gather(*(_timed(operation) for operation in operations))
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+
+        p50 = _percentile(latencies, 50)
+        p99 = _percentile(latencies, 99)
+        self.results.append(
+            {
+                "workload": name,
+                "operations": len(operations),
+                "failures": failures,
+                "seconds": round(elapsed, 3),
+                "throughput": round(len(operations) / elapsed, 1) if elapsed else None,
+                "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+                "upstream_calls": self.server.requests - upstream_before,
+                "peak_alloc_mb": round(peak / 1024 / 1024, 2),
+                "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            }
+        )
+
+    # -----------------------------------------------------------------------
+    # Carichi
+    # -----------------------------------------------------------------------
+
+    def _messages(self, prefix: str) -> List[str]:
+        return [f"{prefix} numero {i}: il sensore ha rilevato un evento." for i in range(self.args.messages)]
+
+    def _synthesize(self, text: str) -> Callable[[], Awaitable[Any]]:
+        return lambda: self.client.async_synthesize_request(
+            self.client.request(text, VOICE_ID, language=LANGUAGE)
+        )
+
+    async def cold_and_hot(self) -> None:
+        messages = self._messages("Client")
+        await self.run("client cold", [self._synthesize(m) for m in messages])
+        await self.run("client hot (RAM)", [self._synthesize(m) for m in messages])
+
+        # Svuota solo la RAM: le stesse frasi arrivano dalla cache disco
+        self.client._cache.clear()
+        await self.run("client hot (disk)", [self._synthesize(m) for m in messages])
+
+    async def entity(self) -> None:
+        messages = self._messages("Entità")
+
+        def _get(text: str):
+            async def _operation():
+                _, audio = await self.entity.async_get_tts_audio(text, LANGUAGE, {})
+                return audio
+            return _operation
+
+        await self.run("entity cold", [_get(m) for m in messages])
+        await self.run("entity hot", [_get(m) for m in messages])
+
+    async def broadcast(self) -> None:
+        """Lo stesso annuncio su più speaker nello stesso istante."""
+        players = [f"media_player.speaker_{i}" for i in range(self.args.speakers)]
+
+        def _say(text: str):
+            async def _operation():
+                await self.hass.services.async_call(
+                    DOMAIN,
+                    "say",
+                    {"message": text, "media_player": players, "voice_id": VOICE_ID},
+                    blocking=True,
+                )
+                return True
+            return _operation
+
+        for phase in ("cold", "hot"):
+            operations = [
+                _say(f"Annuncio {i} per tutta la casa.")
+                for i in range(max(1, self.args.messages // 10))
+            ]
+            await self.run(f"say broadcast {phase}", operations)
+
+    async def long_texts(self) -> None:
+        texts = [f"Bollettino {i}. {_LONG_TEXT}" for i in range(max(1, self.args.messages // 10))]
+        await self.run("long text cold", [self._synthesize(t) for t in texts])
+        await self.run("long text hot", [self._synthesize(t) for t in texts])
+
+    async def streaming(self) -> None:
+        """Tempo al primo blocco audio (p50/p99) con la cache fredda."""
+        texts = [f"Streaming {i}. {_LONG_TEXT}" for i in range(max(1, self.args.messages // 10))]
+
+        def _first_chunk(text: str):
+            async def _operation():
+                stream = self.client.async_stream_request(
+                    self.client.request(text, VOICE_ID, language=LANGUAGE)
+                )
+                first = await stream.__anext__()
+                # Consuma il resto, così la clip finisce in cache
+                async for _ in stream:
+                    pass
+                return first
+            return _operation
+
+        await self.run("stream first chunk", [_first_chunk(t) for t in texts])
+
+
+# ---------------------------------------------------------------------------
+# Setup
+# ---------------------------------------------------------------------------
+
+async def _async_setup(config_dir: str, server: MockReverso, args):
+    hass = HomeAssistant(config_dir)
+    os.makedirs(hass.config.path(".storage"), exist_ok=True)
+    await async_setup(hass, {})
+
+    if args.no_rate_limit:
+        reverso_tts.RATE_LIMIT_PER_SECOND = 1_000_000
+        reverso_tts.RATE_LIMIT_BURST = 1_000_000
+
+    client = reverso_tts.async_get_client(hass)
+    client.configure(memory_cache_mb=args.memory_cache_mb, base_url=server.base_url)
+
+    # Config entry minimale: l'entità legge solo id e opzioni
+    entry = SimpleNamespace(
+        entry_id="benchmark", options={"voice_id": VOICE_ID}, data={}
+    )
+    entity = reverso_tts.ReversoTTSEntity(LANGUAGE, client.view(), entry)
+
+    # Servizi di destinazione del say: nessun dispositivo reale
+    async def _play_media(call: ServiceCall) -> None:
+        return None
+
+    async def _tts_speak(call: ServiceCall) -> None:
+        await entity.async_get_tts_audio(call.data["message"], LANGUAGE, call.data.get("options"))
+
+    hass.services.async_register("media_player", "play_media", _play_media)
+    hass.services.async_register("tts", "speak", _tts_speak)
+
+    return hass, client, entity
+
+
+async def _async_main(args) -> List[Dict[str, Any]]:
+    server = MockReverso(
+        MockSettings(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            cloudflare_rate=args.cloudflare_rate,
+        )
+    )
+    await server.start()
+
+    with tempfile.TemporaryDirectory(prefix="reversotts_bench_") as config_dir:
+        hass, client, entity = await _async_setup(config_dir, server, args)
+        bench = Bench(hass, client, entity, server, args)
+        try:
+            await bench.cold_and_hot()
+            await bench.entity()
+            await bench.broadcast()
+            await bench.long_texts()
+            await bench.streaming()
+        finally:
+            await hass.async_stop(force=True)
+            await server.stop()
+
+    bench.results.append({"workload": "client metrics", **client.stats()})
+    return bench.results
+
+
+def _print_table(results: List[Dict[str, Any]]) -> None:
+    columns = (
+        "workload", "operations", "failures", "seconds", "throughput",
+        "p50_ms", "p99_ms", "upstream_calls", "peak_alloc_mb", "max_rss_mb",
+    )
+    rows = [r for r in results if "operations" in r]
+    widths = [
+        max(len(col), *(len(str(r.get(col))) for r in rows)) for col in columns
+    ]
+    print("  ".join(col.ljust(w) for col, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row.get(col)).ljust(w) for col, w in zip(columns, widths)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100, help="frasi per carico")
+    parser.add_argument("--concurrency", type=int, default=8, help="richieste contemporanee")
+    parser.add_argument("--speakers", type=int, default=5, help="speaker nel broadcast")
+    parser.add_argument("--memory-cache-mb", type=float, default=16)
+    parser.add_argument(
+        "--no-rate-limit",
+        action="store_true",
+        help="disattiva il token bucket verso Reverso (misura il solo client)",
+    )
+    parser.add_argument("--json", help="salva i risultati anche in questo file")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    results = asyncio.run(_async_main(args))
+
+    _print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Local stand-in for the Reverso TTS API, used by the benchmark harness.
+
+Risponde a ``POST /<voice_id>`` come il servizio reale, con latenza, tasso
+di errori e pagine di challenge Cloudflare configurabili. L'audio è fatto
+di frame MP3 validi (silenzio), proporzionali alla lunghezza del testo, così
+concatenazione e streaming lavorano su dati realistici.
+
+Uso standalone::
+
+    python benchmarks/mock_reverso.py --port 8099 --latency 0.4 --error-rate 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+from dataclasses import dataclass
+
+from aiohttp import web
+
+# MPEG 1 layer III, 128 kbps, 44.1 kHz, senza padding: 417 byte per frame
+_FRAME_HEADER = b"\xff\xfb\x90\x64"
+_FRAME = _FRAME_HEADER + bytes(417 - len(_FRAME_HEADER))
+
+# Circa 26 ms per frame: ~12 caratteri al secondo di parlato
+_FRAMES_PER_CHAR = 3
+
+_CLOUDFLARE_PAGE = (
+    b"<!DOCTYPE html><html><head><title>Just a moment...</title></head>"
+    b"<body>Checking your browser before accessing voice.reverso.net.</body></html>"
+)
+
+
+@dataclass
+class MockSettings:
+    """Comportamento del server finto."""
+
+    latency: float = 0.3          # secondi, media
+    jitter: float = 0.1           # secondi, +/- uniforme
+    error_rate: float = 0.0       # quota di risposte 500
+    cloudflare_rate: float = 0.0  # quota di pagine di challenge Cloudflare
+    chunk_size: int = 4096        # byte per scrittura, per simulare lo streaming
+
+
+def mp3_for_text(text: str) -> bytes:
+    """Audio finto per un testo: frame validi proporzionali alla lunghezza."""
+    return _FRAME * max(1, len(text) * _FRAMES_PER_CHAR)
+
+
+class MockReverso:
+    """Server HTTP locale che imita l'endpoint TTS di Reverso."""
+
+    def __init__(self, settings: MockSettings | None = None) -> None:
+        self.settings = settings or MockSettings()
+        self.requests = 0
+        self._runner: web.AppRunner | None = None
+        self.port = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        payload = await request.json()
+        settings = self.settings
+
+        delay = settings.latency + random.uniform(-settings.jitter, settings.jitter)
+        await asyncio.sleep(max(0.0, delay))
+
+        roll = random.random()
+        if roll < settings.cloudflare_rate:
+            return web.Response(status=403, body=_CLOUDFLARE_PAGE, content_type="text/html")
+        if roll < settings.cloudflare_rate + settings.error_rate:
+            return web.Response(status=500, text="Internal Server Error")
+
+        audio = mp3_for_text(payload.get("text", ""))
+        response = web.StreamResponse(headers={"Content-Type": "audio/mpeg"})
+        response.content_length = len(audio)
+        await response.prepare(request)
+        for pos in range(0, len(audio), settings.chunk_size):
+            await response.write(audio[pos:pos + settings.chunk_size])
+        await response.write_eof()
+        return response
+
+    async def start(self, port: int = 0) -> None:
+        app = web.Application()
+        app.router.add_post("/{voice_id}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]  # porta scelta dal sistema
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    server = MockReverso(
+        MockSettings(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            cloudflare_rate=args.cloudflare_rate,
+        )
+    )
+    await server.start(args.port)
+    print(f"Mock Reverso in ascolto su {server.base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", type=float, default=0.3, help="latenza media (s)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="variazione della latenza (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="quota di risposte 500")
+    parser.add_argument(
+        "--cloudflare-rate", type=float, default=0.0, help="quota di challenge Cloudflare"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8099)
+    add_arguments(parser)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
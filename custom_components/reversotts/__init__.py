@@ -1,51 +1,198 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-import hashlib
 import os
-import time
+
+import voluptuous as vol
+import yaml
 
 from homeassistant.core import HomeAssistant, ServiceCall
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.start import async_at_started
+
+from .cache import DiskCache, make_cache_key, normalize_speed
+from .const import (
+    CONF_CACHE_POLICY,
+    CONF_CACHE_TTL_DAYS,
+    CONF_DISK_CACHE_MB,
+    CONF_LANG,
+    CONF_PITCH,
+    CONF_VERBALIZE_NUMBERS,
+    CONF_DETECT_LANGUAGE,
+    DEFAULT_CACHE_POLICY,
+    DEFAULT_CACHE_TTL_DAYS,
+    DEFAULT_DISK_CACHE_MB,
+    DOMAIN,
+    SUBSTITUTIONS_FILE,
+)
+from .prewarm import async_prewarm_at_startup, async_prewarm_from_data
+from .text import TextNormalizer, render_template
+from .catalog import VOICE_LIST, select_voice
+from .langdetect import detect_language
 
-from .voices import VOICES
-
-DOMAIN = "reversotts"
 _LOGGER = logging.getLogger(__name__)
 
 CACHE_DIR = "reversotts_cache"
+CACHE_INDEX_FILE = "reversotts_cache.db"
+
+PLATFORMS = ["tts", "sensor"]
 
-# Cache TTL (in giorni)
-CACHE_TTL_DAYS = 30
-CACHE_TTL_SECONDS = CACHE_TTL_DAYS * 86400
+PREWARM_SCHEMA = vol.Schema(
+    {
+        vol.Optional("messages"): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional("file"): cv.string,
+        vol.Optional("voice_id"): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional("speed"): vol.All(cv.ensure_list, [vol.Coerce(float)]),
+    }
+)
 
 
 def _cleanup_cache_sync(hass: HomeAssistant):
     """Logica sincrona per la pulizia dei file (eseguita fuori dal loop principale)."""
-    cache_path = hass.data[DOMAIN]["cache_path"]
-    now = time.time()
-    removed = 0
+    disk_cache: DiskCache = hass.data[DOMAIN]["disk_cache"]
+
+    # Query sull'indice: nessuna scansione della cartella
+    removed = disk_cache.cleanup()
+
+    if removed:
+        _LOGGER.info("ReversoTTS cache cleanup: rimossi %s file vecchi", removed)
+
 
+def _load_substitutions(path: str) -> dict:
+    """Legge le sostituzioni dell'utente (eseguita nell'executor)."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError) as err:
+        _LOGGER.error("ReversoTTS: impossibile leggere %s: %s", path, err)
+        return {}
+    if not isinstance(data, dict):
+        _LOGGER.error("ReversoTTS: %s deve contenere un dizionario testo: sostituzione", path)
+        return {}
+    return {str(k): str(v) for k, v in data.items()}
+
+
+def _open_disk_cache(cache_path: str, index_path: str) -> DiskCache:
+    """Crea la cartella della cache e apre l'indice (eseguita nell'executor)."""
     if not os.path.exists(cache_path):
+        _LOGGER.debug("Creazione cartella cache in: %s", cache_path)
+        os.makedirs(cache_path, exist_ok=True)
+
+    return DiskCache(
+        cache_path,
+        index_path,
+        max_bytes=DEFAULT_DISK_CACHE_MB * 1024 * 1024,
+        policy=DEFAULT_CACHE_POLICY,
+        ttl=DEFAULT_CACHE_TTL_DAYS * 86400,
+    )
+
+def _as_entity_ids(value) -> list:
+    """Lista di entity_id senza duplicati da stringa, stringa con virgole o lista."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return list(dict.fromkeys(str(v).strip() for v in value if str(v).strip()))
+
+
+# Attesa della fine dell'annuncio raggruppato prima di sciogliere il gruppo
+GROUP_START_TIMEOUT = 10
+GROUP_MAX_DURATION = 600
+
+
+def _group_members(hass: HomeAssistant, entity_id: str) -> list:
+    state = hass.states.get(entity_id)
+    return list(state.attributes.get("group_members") or []) if state else []
+
+
+async def _async_restore_groups(
+    hass: HomeAssistant, leader: str, previous: dict
+) -> None:
+    """A fine annuncio riporta i player al raggruppamento di prima.
+
+    Attende che il leader inizi e poi smetta di suonare, poi separa i player
+    aggiunti per l'annuncio e riunisce al loro leader quelli che prima
+    facevano parte di un altro gruppo.
+    """
+    started = False
+    for elapsed in range(GROUP_MAX_DURATION):
+        state = hass.states.get(leader)
+        if state is not None and state.state == "playing":
+            started = True
+        elif started or elapsed >= GROUP_START_TIMEOUT:
+            break
+        await asyncio.sleep(1)
+
+    before = previous.get(leader) or []
+    added = [player for player in previous if player != leader and player not in before]
+    if not added:
         return
 
-    for filename in os.listdir(cache_path):
-        if not filename.endswith(".mp3"):
-            continue
+    try:
+        await hass.services.async_call(
+            "media_player", "unjoin", {"entity_id": added}, blocking=True
+        )
+        for player in added:
+            members = previous[player]
+            if len(members) > 1 and members[0] != player:
+                await hass.services.async_call(
+                    "media_player",
+                    "join",
+                    {"entity_id": members[0], "group_members": [player]},
+                    blocking=True,
+                )
+    except HomeAssistantError as err:
+        _LOGGER.warning("ReversoTTS: impossibile ripristinare i gruppi dei media player: %s", err)
+
+
+async def _async_play_url(hass: HomeAssistant, media_players: list, url: str, group: bool):
+    """Riproduce la stessa clip su tutti i media player.
+
+    Una sola chiamata play_media con tutti i target: Home Assistant la
+    inoltra alle entità in parallelo. Con ``group`` i player vengono prima
+    uniti al primo della lista (media_player.join) e la clip parte solo sul
+    leader, così la riproduzione è allineata; finito l'annuncio il
+    raggruppamento precedente viene ripristinato in background. Se il
+    raggruppamento non è supportato si ripiega sulla riproduzione in parallelo.
+    """
+    restore = None
+    if group and len(media_players) > 1:
+        previous = {player: _group_members(hass, player) for player in media_players}
+        try:
+            await hass.services.async_call(
+                "media_player",
+                "join",
+                {"entity_id": media_players[0], "group_members": media_players[1:]},
+                blocking=True,
+            )
+            media_players = media_players[:1]
+            restore = _async_restore_groups(hass, media_players[0], previous)
+        except HomeAssistantError as err:
+            _LOGGER.warning("ReversoTTS: raggruppamento non riuscito, riproduzione in parallelo: %s", err)
 
-        full_path = os.path.join(cache_path, filename)
-        if os.path.isfile(full_path):
-            try:
-                age = now - os.path.getmtime(full_path)
-                if age > CACHE_TTL_SECONDS:
-                    os.remove(full_path)
-                    removed += 1
-            except Exception as e:
-                _LOGGER.error("Errore durante la pulizia del file %s: %s", filename, e)
+    try:
+        await hass.services.async_call(
+            "media_player",
+            "play_media",
+            {
+                "entity_id": media_players,
+                "media_content_id": url,
+                "media_content_type": "music",
+            },
+            blocking=True,
+        )
+    finally:
+        # Anche se play_media fallisce i player non restano raggruppati
+        if restore is not None:
+            hass.async_create_background_task(restore, "reversotts_restore_groups")
 
-    if removed:
-        _LOGGER.info("ReversoTTS cache cleanup: rimossi %s file vecchi", removed)
 
 async def _async_schedule_cleanup(hass: HomeAssistant):
     """Funzione asincrona che avvia la pulizia e schedula la successiva."""
@@ -69,25 +216,48 @@ async def async_setup(hass: HomeAssistant, config: dict):
     # Costruisce il percorso verso /config/www/reversotts_cache
     # hass.config.path("www") punta direttamente alla cartella www di HA
     cache_path = hass.config.path("www", CACHE_DIR)
-    
-    # Crea la cartella se non esiste
-    if not os.path.exists(cache_path):
-        _LOGGER.debug("Creazione cartella cache in: %s", cache_path)
-        os.makedirs(cache_path, exist_ok=True)
+
+    # L'indice sta fuori da www, così non è esposto su /local
+    index_path = hass.config.path(".storage", CACHE_INDEX_FILE)
+
+    disk_cache = await hass.async_add_executor_job(
+        _open_disk_cache, cache_path, index_path
+    )
 
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN]["cache_path"] = cache_path
+    hass.data[DOMAIN]["disk_cache"] = disk_cache
+
+    # Normalizzazione del testo condivisa, con sostituzioni dell'utente
+    normalizer = TextNormalizer(
+        await hass.async_add_executor_job(
+            _load_substitutions, hass.config.path(SUBSTITUTIONS_FILE)
+        )
+    )
+    hass.data[DOMAIN]["normalizer"] = normalizer
+
+    async def _async_close_disk_cache(_event):
+        await hass.async_add_executor_job(disk_cache.close)
+
+    # Dopo lo stop: il client riporta ancora gli hit in RAM nell'indice
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_FINAL_WRITE, _async_close_disk_cache)
+
+    # Migrazione una tantum al layout attuale (sottocartelle, blob), in background
+    if disk_cache.needs_migration:
+
+        async def _async_migrate_cache() -> None:
+            await hass.async_add_executor_job(disk_cache.migrate_layout)
+
+        hass.async_create_background_task(
+            _async_migrate_cache(), "reversotts_cache_migration"
+        )
 
     #
     # SERVICE: reversotts.list_voices
     #
     async def list_voices(call: ServiceCall):
-        flat = []
-        for group, voices in VOICES.items():
-            for v in voices:
-                flat.append({"group": group, "voice_id": v})
-
-        hass.bus.async_fire("reversotts_voices", {"voices": flat})
+        # Lista già pronta nel catalogo, con lingua, qualità e genere
+        hass.bus.async_fire("reversotts_voices", {"voices": VOICE_LIST})
 
     hass.services.async_register(DOMAIN, "list_voices", list_voices)
 
@@ -107,73 +277,90 @@ async def async_setup(hass: HomeAssistant, config: dict):
     async def say_with_voice(call: ServiceCall):
 
         # -----------------------------
-        # Normalizzazione del testo
+        # Testo del messaggio: resta grezzo, lo normalizza una sola volta il
+        # client (come per l'entità TTS), così la chiave è la stessa
         # -----------------------------
-        message = (
-            call.data["message"]
-                .replace("“", "\"")
-                .replace("”", "\"")
-                .replace("‘", "'")
-                .replace("’", "'")
-        )
+        template = call.data.get("template")
+        variables = call.data.get("variables") or {}
+
+        if template:
+            message = render_template(template, variables)
+        elif call.data.get("message"):
+            message = str(call.data["message"])
+        else:
+            raise ValueError("Specificare message o template per reversotts.say")
 
         # -----------------------------
-        # Normalizzazione universale del media_player
+        # Normalizzazione universale del media_player (uno o più target)
         # -----------------------------
-        media_player = (
+        media_players = _as_entity_ids(
             call.data.get("media_player")
             or call.data.get("entity_id")
             or call.data.get("media_player_entity_id")
             or (call.data.get("target") or {}).get("entity_id")
         )
 
-        # Se è una lista (target multipli), prendi il primo
-        if isinstance(media_player, list):
-            media_player = media_player[0]
-
-        if not media_player:
+        if not media_players:
             raise ValueError("Nessun media_player specificato per reversotts.say")
 
         # -----------------------------
         # Normalizzazione voice_id (opzionale)
         # -----------------------------
-        DEFAULT_VOICE_ID = "Vittorio22k_HQ"  # default interno
-
-        voice_id = (
-            call.data.get("voice_id")
-            or hass.data[DOMAIN].get("voice_id")
-            or DEFAULT_VOICE_ID
+        # Senza voce esplicita la lingua del messaggio può scegliere la voce
+        language = None
+        if not call.data.get("voice_id") and hass.data[DOMAIN].get("detect_language"):
+            language = detect_language(message)
+
+        # Verificata sul catalogo: una voce errata non arriva mai a Reverso
+        voice_id = select_voice(
+            language, call.data.get("voice_id"), hass.data[DOMAIN].get("voice_id")
         )
 
-        # gestisci eventuali valori strani da options
-        if not voice_id or str(voice_id).lower() == "none":
-            voice_id = DEFAULT_VOICE_ID
+        # -----------------------------
+        # Hash per caching (stessa chiave dell'entità TTS)
+        # -----------------------------
+        speed = normalize_speed(
+            call.data.get("speed"), hass.data[DOMAIN].get("speed", 1.0)
+        )
+        # Formato e bitrate della clip sono quelli configurati nel client
+        client = hass.data[DOMAIN].get("client")
+        if client is not None:
+            request = client.request(message, voice_id, speed, language=language)
+            key = request.key
+        else:
+            key = make_cache_key(normalizer(message, language), voice_id, speed, "mp3")
 
         # -----------------------------
-        # Hash per caching
+        # Cache disco (lookup sull'indice)
         # -----------------------------
-        key = hashlib.sha1(f"{voice_id}|{message}".encode()).hexdigest()
-        cache_file = os.path.join(cache_path, f"{key}.mp3")
+        relpath = await hass.async_add_executor_job(disk_cache.locate, key)
+        if relpath:
+            _LOGGER.debug("ReversoTTS cache hit: %s", key)
 
         # -----------------------------
-        # Cache disco
+        # Una sola sintesi per tutti i target (template: solo i frammenti mancanti)
         # -----------------------------
-        if os.path.exists(cache_file):
-            _LOGGER.debug("ReversoTTS cache hit: %s", cache_file)
-            await hass.services.async_call(
-                "media_player",
-                "play_media",
-                {
-                    "entity_id": media_player,
-                    "media_content_id": f"/local/{CACHE_DIR}/{key}.mp3", # Rimane così
-                    "media_content_type": "music",
-                },
-                blocking=True,
+        if not relpath and client is not None:
+            if template:
+                audio = await client.async_synthesize_template(
+                    request, template, variables, language
+                )
+            else:
+                audio = await client.async_synthesize_request(request)
+            if audio is not None:
+                relpath = await client.async_publish(request, audio)
+
+        if relpath:
+            await _async_play_url(
+                hass,
+                media_players,
+                f"/local/{CACHE_DIR}/{relpath}",
+                call.data.get("group", False),
             )
             return
 
         # -----------------------------
-        # Chiamata TTS engine
+        # Chiamata TTS engine (con voce di riserva)
         # -----------------------------
         await hass.services.async_call(
             "tts",
@@ -181,7 +368,7 @@ async def async_setup(hass: HomeAssistant, config: dict):
             {
                 "entity_id": "tts.reverso_tts",
                 "message": message,
-                "media_player_entity_id": media_player,
+                "media_player_entity_id": media_players,
                 "options": {
                     "voice_id": voice_id,
                     "speed": call.data.get("speed")
@@ -197,6 +384,48 @@ async def async_setup(hass: HomeAssistant, config: dict):
         schema=None,
     )
 
+    #
+    # SERVICE: reversotts.stats
+    #
+    async def stats_service(call: ServiceCall):
+        """Pubblica le metriche del client con l'evento 'reversotts_stats'."""
+        client = hass.data[DOMAIN].get("client")
+        if client is None:
+            stats = {"disk_cache": await hass.async_add_executor_job(disk_cache.stats)}
+        else:
+            stats = await client.async_stats()
+
+        if call.data.get("reset") and client is not None:
+            client.metrics.reset()
+
+        hass.bus.async_fire("reversotts_stats", stats)
+
+    hass.services.async_register(DOMAIN, "stats", stats_service)
+
+    #
+    # SERVICE: reversotts.prewarm
+    #
+    async def prewarm_service(call: ServiceCall):
+        """Prepara in cache, in background, le frasi indicate."""
+        hass.async_create_background_task(
+            async_prewarm_from_data(hass, dict(call.data)), "reversotts_prewarm"
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        "prewarm",
+        prewarm_service,
+        schema=PREWARM_SCHEMA,
+    )
+
+    # Prewarm automatico da reversotts_prewarm.yaml, a Home Assistant avviato
+    async def _async_startup_prewarm(hass: HomeAssistant) -> None:
+        hass.async_create_background_task(
+            async_prewarm_at_startup(hass), "reversotts_startup_prewarm"
+        )
+
+    async_at_started(hass, _async_startup_prewarm)
+
     # Schedule first cleanup 1 minute after startup
     async_call_later(hass, 60, lambda _: hass.async_create_background_task(
         _async_schedule_cleanup(hass), "reversotts_initial_cleanup"
@@ -209,15 +438,39 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     _LOGGER.debug("Setting up Reverso TTS config entry: %s", entry.entry_id)
 
     hass.data[DOMAIN]["voice_id"] = entry.options.get("voice_id")
+    hass.data[DOMAIN]["speed"] = normalize_speed(entry.data.get(CONF_PITCH))
+    hass.data[DOMAIN]["detect_language"] = entry.options.get(CONF_DETECT_LANGUAGE, False)
 
-    await hass.config_entries.async_forward_entry_setups(entry, ["tts"])
+    # Verbalizzazione di numeri e date nella lingua dell'entry
+    hass.data[DOMAIN]["normalizer"].configure(
+        verbalize_numbers=entry.options.get(CONF_VERBALIZE_NUMBERS, False),
+        language=entry.data.get(CONF_LANG),
+    )
+
+    # Limiti della cache disco (dimensione, politica di eviction, TTL)
+    ttl_days = entry.options.get(CONF_CACHE_TTL_DAYS, DEFAULT_CACHE_TTL_DAYS)
+    hass.data[DOMAIN]["disk_cache"].configure(
+        max_bytes=entry.options.get(CONF_DISK_CACHE_MB, DEFAULT_DISK_CACHE_MB) * 1024 * 1024,
+        policy=entry.options.get(CONF_CACHE_POLICY, DEFAULT_CACHE_POLICY),
+        ttl=ttl_days * 86400 if ttl_days else None,
+    )
+
+    # Ricarica l'entry quando cambiano le opzioni (es. dimensione cache RAM)
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry):
+    """Applica le nuove opzioni ricaricando l'entry."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload Reverso TTS config entry."""
     _LOGGER.debug("Unloading Reverso TTS config entry: %s", entry.entry_id)
 
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, ["tts"])
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     return unload_ok
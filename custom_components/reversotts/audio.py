@@ -0,0 +1,162 @@
+"""MP3 helpers for Reverso TTS integration.
+
+Le clip vengono unite a livello di frame MPEG, senza ricodifica: si tolgono
+i tag ID3 e l'eventuale frame Xing/Info (che descrive la durata della sola
+clip originale) e si concatenano i frame audio nell'ordine dato.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Iterable, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+# Formati supportati: Reverso restituisce MP3, gli altri si ottengono con ffmpeg
+FORMAT_MP3 = "mp3"
+FORMAT_OGG = "ogg"  # Opus in contenitore Ogg
+AUDIO_FORMATS = [FORMAT_MP3, FORMAT_OGG]
+
+# Bitrate selezionabili; con MP3 a 128k si usa l'audio di Reverso così com'è
+BITRATES = ["128k", "96k", "64k", "48k", "32k", "24k", "16k"]
+ORIGINAL_BITRATE = "128k"
+
+_ENCODERS = {
+    FORMAT_MP3: ["-c:a", "libmp3lame", "-f", "mp3"],
+    FORMAT_OGG: ["-c:a", "libopus", "-application", "voip", "-f", "ogg"],
+}
+
+# Bitrate (kbps) per [versione MPEG 1][layer] e [versione MPEG 2/2.5][layer]
+_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG 1
+    2: (22050, 24000, 16000),  # MPEG 2
+    0: (11025, 12000, 8000),   # MPEG 2.5
+}
+
+
+def _frame_length(data: bytes, pos: int) -> Optional[int]:
+    """Lunghezza del frame MPEG che inizia in ``pos``, None se non è un header valido."""
+    if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+        return None
+
+    version_bits = (data[pos + 1] >> 3) & 0x03
+    layer_bits = (data[pos + 1] >> 1) & 0x03
+    bitrate_idx = data[pos + 2] >> 4
+    rate_idx = (data[pos + 2] >> 2) & 0x03
+    padding = (data[pos + 2] >> 1) & 0x01
+
+    if version_bits == 1 or layer_bits == 0 or bitrate_idx in (0, 15) or rate_idx == 3:
+        return None
+
+    version = 1 if version_bits == 3 else 2
+    layer = 4 - layer_bits
+    bitrate = _BITRATES[(version, layer)][bitrate_idx] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][rate_idx]
+
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4
+    if layer == 3 and version == 2:
+        return 72 * bitrate // sample_rate + padding
+    return 144 * bitrate // sample_rate + padding
+
+
+def strip_tags(data: bytes) -> bytes:
+    """Restituisce solo i frame audio, senza ID3v2/ID3v1 e frame Xing/Info."""
+    start = 0
+    end = len(data)
+
+    # ID3v2 in testa (dimensione in formato "synchsafe")
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (
+            (data[6] & 0x7F) << 21
+            | (data[7] & 0x7F) << 14
+            | (data[8] & 0x7F) << 7
+            | (data[9] & 0x7F)
+        )
+        start = 10 + size + (10 if data[5] & 0x10 else 0)
+
+    # ID3v1 in coda
+    if end - start >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+
+    # Allinea al primo frame valido
+    audio_start = start
+    while audio_start < end and _frame_length(data, audio_start) is None:
+        audio_start += 1
+    if audio_start >= end:
+        # Non sembra MP3: meglio restituire i dati così come sono
+        return data[start:end]
+    start = audio_start
+
+    # Il primo frame può essere un header Xing/Info senza audio: il tag sta
+    # subito dopo le side information (9-32 byte dopo l'header)
+    length = _frame_length(data, start)
+    head = data[start + 4:start + 40]
+    if length and (b"Xing" in head or b"Info" in head):
+        start += length
+
+    return data[start:end]
+
+
+def concat_mp3(parts: Iterable[bytes]) -> bytes:
+    """Concatena più clip MP3 a livello di frame, senza ricodifica."""
+    return b"".join(strip_tags(part) for part in parts)
+
+
+def normalize_bitrate(value: Optional[str]) -> str:
+    """Bitrate nella forma ``64k``; valori non supportati → originale."""
+    value = str(value or "").strip().lower()
+    if value.isdigit():
+        value = f"{int(value) // 1000}k" if int(value) >= 1000 else f"{value}k"
+    return value if value in BITRATES else ORIGINAL_BITRATE
+
+
+def needs_transcode(audio_format: str, bitrate: Optional[str]) -> bool:
+    """True se il formato richiesto non è l'MP3 originale di Reverso."""
+    return audio_format != FORMAT_MP3 or bitrate not in (None, ORIGINAL_BITRATE)
+
+
+async def async_transcode(
+    binary: str, data: bytes, audio_format: str, bitrate: str
+) -> Optional[bytes]:
+    """Converte una clip MP3 nel formato e bitrate richiesti con ffmpeg.
+
+    Voce mono: a parità di bitrate la qualità resta buona e i file sono
+    molto più piccoli. Restituisce None se ffmpeg non è disponibile o fallisce.
+    """
+    args = [
+        binary, "-hide_banner", "-loglevel", "error",
+        "-f", "mp3", "-i", "pipe:0",
+        "-ac", "1", "-b:a", bitrate,
+        *_ENCODERS[audio_format],
+        "pipe:1",
+    ]
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except OSError as err:
+        _LOGGER.error("ReversoTTS: impossibile avviare ffmpeg (%s): %s", binary, err)
+        return None
+
+    output, error = await process.communicate(data)
+    if process.returncode != 0 or not output:
+        _LOGGER.error(
+            "ReversoTTS: conversione in %s %s fallita: %s",
+            audio_format,
+            bitrate,
+            error[:300].decode(errors="replace"),
+        )
+        return None
+    return output
@@ -0,0 +1,797 @@
+"""Cache layers for Reverso TTS integration."""
+from __future__ import annotations
+
+from collections import OrderedDict
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+# Versione dello schema delle chiavi: incrementarla quando cambia la
+# derivazione, così le vecchie clip non collidono con quelle nuove.
+CACHE_KEY_VERSION = 2
+
+# Overhead stimato per voce (chiave, tupla, nodo OrderedDict)
+_ENTRY_OVERHEAD = 128
+
+# Sottocartella dei file in scrittura, svuotata all'apertura della cache
+_TMP_DIR = ".tmp"
+
+# Versione del layout su disco (PRAGMA user_version dell'indice):
+# 0 = file piatti {key}.mp3, 1 = sottocartelle ab/cd/{key}.mp3,
+# 2 = blob per contenuto ab/cd/{sha256}.{ext}, condivisi tra le chiavi
+LAYOUT_FLAT = 0
+LAYOUT_SHARDED = 1
+LAYOUT_BLOBS = 2
+
+# Politiche di eviction della cache su disco
+POLICY_LRU = "lru"
+POLICY_LFU = "lfu"
+POLICY_TTL = "ttl"
+CACHE_POLICIES = [POLICY_LRU, POLICY_LFU, POLICY_TTL]
+
+# Ordine di eviction per politica (prima le clip da sacrificare)
+_EVICTION_ORDER = {
+    POLICY_LRU: "last_access",
+    POLICY_LFU: "hits, last_access",
+    POLICY_TTL: "created_at",
+}
+
+
+def normalize_speed(value: Any, default: float = 1.0) -> float:
+    """Converte la velocità nel valore inviato a Reverso (0.5 - 2.0)."""
+    if value is None or value == "":
+        return default
+    try:
+        speed = float(str(value).replace(",", "."))
+    except (TypeError, ValueError):
+        return default
+    # FIX 400: fuori range Reverso risponde con errore
+    if speed < 0.5 or speed > 2.0:
+        return 1.0
+    return speed
+
+
+def _format_token(audio_format: str, bitrate: Optional[str]) -> str:
+    # Senza bitrate (audio originale di Reverso) la chiave resta quella di sempre
+    return f"{audio_format}@{bitrate}" if bitrate else audio_format
+
+
+def make_cache_key(
+    text: str,
+    voice_id: str,
+    speed: float,
+    audio_format: str = "mp3",
+    bitrate: Optional[str] = None,
+) -> str:
+    """Chiave di cache condivisa da servizio ``say`` ed entità TTS."""
+    fmt = _format_token(audio_format, bitrate)
+    raw = f"v{CACHE_KEY_VERSION}|{voice_id}|{speed:.2f}|{fmt}|{text}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def content_hash(data: bytes) -> str:
+    """Nome del blob: sha256 dell'audio (64 caratteri, mai uguale a una chiave)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_text_key(
+    text: str, speed: float, audio_format: str = "mp3", bitrate: Optional[str] = None
+) -> str:
+    """Chiave del solo testo (senza voce): trova la stessa frase in qualsiasi voce."""
+    fmt = _format_token(audio_format, bitrate)
+    raw = f"v{CACHE_KEY_VERSION}|{speed:.2f}|{fmt}|{text}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class MemoryCache:
+    """Cache LRU in RAM limitata in byte, con TTL opzionale.
+
+    Come su disco, l'audio identico sotto chiavi diverse è tenuto una sola
+    volta: le chiavi puntano al contenuto, che esce dalla RAM con l'ultima.
+
+    Non è thread-safe: va usata solo dal loop di Home Assistant.
+    """
+
+    def __init__(self, max_bytes: int, ttl: Optional[float] = None) -> None:
+        self._max_bytes = max(0, int(max_bytes))
+        self._ttl = ttl or None
+        self._data: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._blobs: Dict[str, List[Any]] = {}  # hash → [audio, riferimenti]
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    @property
+    def size(self) -> int:
+        """Byte attualmente occupati."""
+        return self._bytes
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    def configure(self, max_bytes: int, ttl: Optional[float] = None) -> None:
+        """Cambia budget e TTL senza perdere il contenuto (oltre il nuovo budget)."""
+        self._max_bytes = max(0, int(max_bytes))
+        self._ttl = ttl or None
+        self._trim()
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        blob, stored_at = entry
+        if self._ttl is not None and time.monotonic() - stored_at > self._ttl:
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return self._blobs[blob][0]
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) + _ENTRY_OVERHEAD > self._max_bytes:
+            # Più grande dell'intero budget: non ha senso tenerlo in RAM
+            return
+
+        if key in self._data:
+            self._remove(key)
+
+        blob = content_hash(data)
+        shared = self._blobs.get(blob)
+        if shared is None:
+            self._blobs[blob] = [data, 1]
+            self._bytes += len(data)
+        else:
+            shared[1] += 1
+
+        self._data[key] = (blob, time.monotonic())
+        self._bytes += _ENTRY_OVERHEAD
+        self._trim()
+
+    def _trim(self) -> None:
+        while self._bytes > self._max_bytes:
+            old_key = next(iter(self._data))
+            self._remove(old_key)
+            self.evictions += 1
+
+    def pop(self, key: str) -> None:
+        if key in self._data:
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._blobs.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._data),
+            "blobs": len(self._blobs),
+            "bytes": self._bytes,
+            "max_bytes": self._max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key: str) -> None:
+        blob, _ = self._data.pop(key)
+        self._bytes -= _ENTRY_OVERHEAD
+        shared = self._blobs[blob]
+        shared[1] -= 1
+        if not shared[1]:
+            del self._blobs[blob]
+            self._bytes -= len(shared[0])
+
+
+class DiskCache:
+    """Cache su disco con indice SQLite e blob indirizzati per contenuto.
+
+    L'audio è salvato una sola volta per contenuto: ogni blob è un file
+    ``ab/cd/{sha256}.{ext}`` nella cartella della cache (due livelli di
+    sottocartelle dai primi caratteri dell'hash, così nessuna cartella cresce
+    oltre poche centinaia di voci). Chiavi diverse con audio identico (es.
+    velocità ``1`` e ``1.0``, o la stessa frase da ``say`` e dall'entità)
+    puntano allo stesso blob; la tabella ``blobs`` ne conta i riferimenti e il
+    file viene rimosso solo quando l'ultima chiave esce dalla cache.
+
+    L'indice registra per ogni chiave voce, velocità, lunghezza del testo,
+    dimensione, creazione, ultimo accesso, numero di hit e blob. Lookup,
+    scadenza TTL ed eviction sono query sull'indice: nessun
+    ``exists``/``listdir``/``getmtime`` sulla cartella.
+
+    Con la politica ``lru`` o ``lfu`` il TTL conta dall'ultimo accesso, quindi
+    una frase usata spesso non scade mai; con ``ttl`` conta dalla creazione.
+    Se è impostato ``max_bytes`` (byte effettivi su disco, blob condivisi
+    contati una volta) la cache viene ridotta ad ogni scrittura.
+
+    I metodi eseguono I/O bloccante: vanno chiamati nell'executor.
+    """
+
+    def __init__(
+        self,
+        cache_path: str,
+        index_path: str,
+        max_bytes: int = 0,
+        policy: str = POLICY_LRU,
+        ttl: Optional[float] = None,
+    ) -> None:
+        self._cache_path = cache_path
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.configure(max_bytes, policy, ttl)
+
+        # File temporanei rimasti da un crash durante una scrittura
+        self._tmp_path = os.path.join(cache_path, _TMP_DIR)
+        shutil.rmtree(self._tmp_path, ignore_errors=True)
+        os.makedirs(self._tmp_path, exist_ok=True)
+
+        is_new = not os.path.exists(index_path)
+        self._db = sqlite3.connect(index_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                voice TEXT,
+                speed REAL,
+                text_len INTEGER,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                text_key TEXT,
+                ext TEXT NOT NULL DEFAULT 'mp3',
+                blob TEXT
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                ext TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                refs INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_created_at ON entries (created_at);
+            CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+            """
+        )
+
+        # Migrazione: indici creati prima delle colonne "hits", "text_key", "ext" e "blob"
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(entries)")}
+        if "hits" not in columns:
+            self._db.execute(
+                "ALTER TABLE entries ADD COLUMN hits INTEGER NOT NULL DEFAULT 0"
+            )
+        if "text_key" not in columns:
+            self._db.execute("ALTER TABLE entries ADD COLUMN text_key TEXT")
+        if "ext" not in columns:
+            self._db.execute("ALTER TABLE entries ADD COLUMN ext TEXT NOT NULL DEFAULT 'mp3'")
+        if "blob" not in columns:
+            # NULL = file con il nome della chiave, scritto prima dei blob
+            self._db.execute("ALTER TABLE entries ADD COLUMN blob TEXT")
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS entries_hits ON entries (hits, last_access)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS entries_text_key ON entries (text_key)"
+        )
+
+        if is_new:
+            self._import_existing()
+
+        self._layout = self._db.execute("PRAGMA user_version").fetchone()[0]
+        self._shards: set = set()  # sottocartelle già create
+
+        # Byte su disco: file delle vecchie chiavi più blob (una volta sola)
+        self._total = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries WHERE blob IS NULL"
+        ).fetchone()[0] + self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM blobs"
+        ).fetchone()[0]
+
+    def configure(
+        self, max_bytes: int = 0, policy: str = POLICY_LRU, ttl: Optional[float] = None
+    ) -> None:
+        """Imposta dimensione massima (0 = illimitata), politica e TTL in secondi."""
+        if policy not in _EVICTION_ORDER:
+            _LOGGER.warning("ReversoTTS: politica cache sconosciuta %s, uso %s", policy, POLICY_LRU)
+            policy = POLICY_LRU
+        self._max_bytes = max(0, int(max_bytes))
+        self._policy = policy
+        self._ttl = ttl or None
+
+    def relpath(self, name: str, ext: str = "mp3") -> str:
+        """Percorso di un file relativo alla cartella della cache (per /local)."""
+        return f"{name[:2]}/{name[2:4]}/{name}.{ext}"
+
+    def path_for(self, name: str, ext: str = "mp3") -> str:
+        return os.path.join(self._cache_path, self.relpath(name, ext))
+
+    def _legacy_path(self, key: str) -> str:
+        """Percorso del layout piatto, prima della migrazione."""
+        return os.path.join(self._cache_path, f"{key}.mp3")
+
+    @property
+    def needs_migration(self) -> bool:
+        return self._layout < LAYOUT_BLOBS
+
+    @property
+    def _flat(self) -> bool:
+        """Possono esserci ancora file nel layout piatto."""
+        return self._layout < LAYOUT_SHARDED
+
+    def locate(self, key: str, touch: bool = True) -> Optional[str]:
+        """``relpath`` della clip se è in cache, pronta per essere servita.
+
+        Una clip non ancora migrata viene spostata al volo nella sua
+        sottocartella, così l'URL /local restituito è sempre valido. La
+        clip servita per URL conta come un hit.
+        """
+        found = self._file_of(key)
+        if found is None:
+            return None
+        name, ext = found
+        if name == key and self._flat and not os.path.exists(self.path_for(key, ext)):
+            if not self._migrate_file(key):
+                self._remove([key])
+                return None
+        if touch:
+            self.touch_many({key: 1})
+        return self.relpath(name, ext)
+
+    def contains(self, key: str) -> bool:
+        return self._file_of(key) is not None
+
+    def _file_of(self, key: str) -> Optional[Tuple[str, str]]:
+        """Nome (blob, o chiave per i vecchi file) ed estensione, None se non è in cache."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COALESCE(blob, key), ext FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def find_by_text(self, text_key: str) -> Optional[str]:
+        """Chiave di una clip con lo stesso testo in una voce qualsiasi."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT key FROM entries WHERE text_key = ? "
+                "ORDER BY last_access DESC LIMIT 1",
+                (text_key,),
+            ).fetchone()
+        return row[0] if row else None
+
+    def most_used(self, limit: int) -> List[str]:
+        """Chiavi con più hit, dalla più usata."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key FROM entries WHERE hits > 0 "
+                "ORDER BY hits DESC, last_access DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def load_many(self, keys: List[str], max_bytes: int) -> List[Tuple[str, bytes]]:
+        """Legge le clip indicate, nell'ordine, fino a max_bytes.
+
+        Non aggiorna accessi e hit: serve a riempire la cache RAM, non è un uso.
+        """
+        clips: List[Tuple[str, bytes]] = []
+        total = 0
+        for key in keys:
+            data = self.get(key, touch=False)
+            if data is None or total + len(data) > max_bytes:
+                continue
+            total += len(data)
+            clips.append((key, data))
+        return clips
+
+    def get(self, key: str, touch: bool = True) -> Optional[bytes]:
+        """Legge la clip se indicizzata, aggiornando l'ultimo accesso."""
+        found = self._file_of(key)
+        if found is None:
+            return None
+
+        data = self._read(key, found)
+        if data is None or not touch:
+            return data
+
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE entries SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                (time.time(), key),
+            )
+        return data
+
+    def _read(self, key: str, found: Tuple[str, str]) -> Optional[bytes]:
+        name, ext = found
+        try:
+            with open(self.path_for(name, ext), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            pass
+
+        if name == key and self._flat and self._migrate_file(key):
+            with open(self.path_for(key, ext), "rb") as f:
+                return f.read()
+
+        # Vecchio file passato a un blob proprio ora (migrazione in corso)
+        moved = self._file_of(key)
+        if moved is not None and moved != found:
+            return self._read(key, moved)
+
+        # File rimosso a mano: riallinea l'indice
+        self._remove([key])
+        return None
+
+    def touch_many(self, touches: Dict[str, int]) -> None:
+        """Registra hit serviti da altri livelli (es. RAM): chiave → numero di hit."""
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE entries SET last_access = ?, hits = hits + ? WHERE key = ?",
+                [(now, hits, key) for key, hits in touches.items()],
+            )
+
+    def put(
+        self,
+        key: str,
+        data: bytes,
+        voice: Optional[str] = None,
+        speed: Optional[float] = None,
+        text_len: Optional[int] = None,
+        text_key: Optional[str] = None,
+        ext: str = "mp3",
+    ) -> str:
+        """Salva la clip e ne restituisce il ``relpath``.
+
+        Se lo stesso audio è già in cache (con qualsiasi chiave) non viene
+        scritto nulla: la chiave punta al blob esistente.
+        """
+        blob = content_hash(data)
+        path = self.path_for(blob, ext)
+        if not self._has_blob(blob):
+            self._ensure_shard(path)
+            self._write_atomic(path, data)
+
+        now = time.time()
+        with self._lock, self._db:
+            old = self._db.execute(
+                "SELECT blob, ext, size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if old is None or old[0] != blob:
+                if old is not None:
+                    self._release(key, *old)
+                self._acquire(blob, ext, data, path)
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, voice, speed, text_len, size, created_at, last_access, text_key, ext, blob) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, voice, speed, text_len, len(data), now, now, text_key, ext, blob),
+            )
+
+        if self._max_bytes and self._total > self._max_bytes:
+            self.evict_to_size(self._max_bytes)
+        return self.relpath(blob, ext)
+
+    def cleanup(self) -> int:
+        """Applica TTL e dimensione massima secondo la politica configurata."""
+        removed = 0
+        if self._ttl is not None:
+            removed += self.expire(self._ttl)
+        if self._max_bytes:
+            removed += self.evict_to_size(self._max_bytes)
+        return removed
+
+    def expire(self, max_age: float) -> int:
+        """Rimuove le clip più vecchie di ``max_age`` secondi.
+
+        L'età è misurata dall'ultimo accesso, tranne che con la politica ``ttl``.
+        """
+        column = "created_at" if self._policy == POLICY_TTL else "last_access"
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT key FROM entries WHERE {column} < ?",
+                (time.time() - max_age,),
+            ).fetchall()
+        removed = self._remove([key for (key,) in rows])
+        self.evictions += removed
+        return removed
+
+    def evict_to_size(self, max_bytes: int) -> int:
+        """Rimuove clip secondo la politica finché si sta in ``max_bytes``.
+
+        Un blob condiviso libera spazio solo quando escono tutte le sue chiavi.
+        """
+        with self._lock:
+            total = self._total
+            if total <= max_bytes:
+                return 0
+
+            victims = []
+            refs: Dict[str, int] = {}
+            for key, size, blob, blob_refs, blob_size in self._db.execute(
+                "SELECT e.key, e.size, e.blob, b.refs, b.size "
+                "FROM entries e LEFT JOIN blobs b ON b.hash = e.blob "
+                f"ORDER BY {_EVICTION_ORDER[self._policy]}"
+            ):
+                if total <= max_bytes:
+                    break
+                victims.append(key)
+                if blob is None:
+                    total -= size
+                    continue
+                refs[blob] = refs.get(blob, blob_refs or 1) - 1
+                if refs[blob] == 0:
+                    total -= blob_size or 0
+
+        removed = self._remove(victims)
+        self.evictions += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, logical = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            blobs = self._db.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+        return {
+            "entries": entries,
+            "blobs": blobs,
+            "bytes": self._total,
+            "dedup_saved_bytes": max(0, logical - self._total),
+            "max_bytes": self._max_bytes,
+            "policy": self._policy,
+            "evictions": self.evictions,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def migrate_layout(self) -> int:
+        """Porta (una sola volta) i vecchi file al layout attuale.
+
+        Prima i file piatti vanno nelle sottocartelle, poi ogni file con il
+        nome della chiave diventa un blob (o si unisce a un blob identico).
+        Il nuovo nome viene collegato con un hardlink (copia se il filesystem
+        non li supporta, es. exFAT) e solo dopo viene tolto quello vecchio:
+        in nessun momento la clip manca da entrambi i percorsi.
+        """
+        if not self.needs_migration:
+            return 0
+
+        moved = 0
+        if self._flat:
+            with os.scandir(self._cache_path) as it:
+                names = [
+                    entry.name for entry in it
+                    if entry.name.endswith(".mp3") and entry.is_file()
+                ]
+            for name in names:
+                if self._migrate_file(name[:-4]):
+                    moved += 1
+            self._set_layout(LAYOUT_SHARDED)
+            if moved:
+                _LOGGER.info("ReversoTTS: %s file di cache spostati nelle sottocartelle", moved)
+
+        with self._lock:
+            keys = [
+                key for (key,) in self._db.execute("SELECT key FROM entries WHERE blob IS NULL")
+            ]
+        saved = self._total
+        for key in keys:
+            self._adopt(key)
+        self._set_layout(LAYOUT_BLOBS)
+        if keys:
+            _LOGGER.info(
+                "ReversoTTS: %s clip convertite in blob, %s byte risparmiati",
+                len(keys),
+                saved - self._total,
+            )
+        return moved + len(keys)
+
+    def _set_layout(self, layout: int) -> None:
+        with self._lock:
+            self._db.execute(f"PRAGMA user_version = {layout}")
+        self._layout = layout
+
+    def _migrate_file(self, key: str) -> bool:
+        """Porta una clip dal layout piatto alla sua sottocartella."""
+        legacy = self._legacy_path(key)
+        path = self.path_for(key)
+        try:
+            self._ensure_shard(path)
+            self._link(legacy, path)
+            os.remove(legacy)
+        except FileNotFoundError:
+            return os.path.exists(path)
+        except OSError as err:
+            _LOGGER.error("ReversoTTS: impossibile migrare il file %s: %s", key, err)
+            return False
+        return True
+
+    def _adopt(self, key: str) -> None:
+        """Sostituisce il file con il nome della chiave con il blob del suo contenuto."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT ext, size FROM entries WHERE key = ? AND blob IS NULL", (key,)
+            ).fetchone()
+            if row is None:
+                return
+            ext, size = row
+            path = self.path_for(key, ext)
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                blob = content_hash(data)
+                blob_path = self.path_for(blob, ext)
+                if not self._has_blob(blob, locked=True) and blob_path != path:
+                    self._ensure_shard(blob_path)
+                    self._link(path, blob_path)
+            except FileNotFoundError:
+                data = blob = None
+            except OSError as err:
+                _LOGGER.error("ReversoTTS: impossibile convertire il file %s: %s", key, err)
+                return
+
+            with self._db:
+                if blob is None:
+                    # File rimosso a mano: riallinea l'indice
+                    self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self._total -= size
+                    return
+                self._total -= size
+                self._acquire(blob, ext, data, blob_path)
+                self._db.execute(
+                    "UPDATE entries SET blob = ?, size = ? WHERE key = ?",
+                    (blob, len(data), key),
+                )
+
+            if blob_path != path:
+                self._unlink(path)
+
+    def _has_blob(self, blob: str, locked: bool = False) -> bool:
+        query = "SELECT 1 FROM blobs WHERE hash = ?"
+        if locked:
+            return self._db.execute(query, (blob,)).fetchone() is not None
+        with self._lock:
+            return self._db.execute(query, (blob,)).fetchone() is not None
+
+    def _acquire(self, blob: str, ext: str, data: bytes, path: str) -> None:
+        """Aggiunge un riferimento al blob (con il lock, in transazione)."""
+        if self._has_blob(blob, locked=True):
+            self._db.execute("UPDATE blobs SET refs = refs + 1 WHERE hash = ?", (blob,))
+            return
+        if not os.path.exists(path):
+            # Rimosso da un'eviction dopo il controllo in put: si riscrive
+            self._ensure_shard(path)
+            self._write_atomic(path, data)
+        self._db.execute(
+            "INSERT INTO blobs (hash, ext, size, refs) VALUES (?, ?, ?, 1)",
+            (blob, ext, len(data)),
+        )
+        self._total += len(data)
+
+    def _release(self, key: str, blob: Optional[str], ext: str, size: int) -> None:
+        """Toglie il riferimento di una chiave (con il lock, in transazione).
+
+        Il file sparisce con l'ultimo riferimento; i vecchi file con il nome
+        della chiave non sono condivisi.
+        """
+        if blob is None:
+            self._unlink(self.path_for(key, ext), self._legacy_path(key))
+            self._total -= size
+            return
+
+        row = self._db.execute(
+            "SELECT refs, size FROM blobs WHERE hash = ?", (blob,)
+        ).fetchone()
+        if row is None:
+            return
+        refs, blob_size = row
+        if refs > 1:
+            self._db.execute("UPDATE blobs SET refs = refs - 1 WHERE hash = ?", (blob,))
+            return
+        self._db.execute("DELETE FROM blobs WHERE hash = ?", (blob,))
+        self._unlink(self.path_for(blob, ext))
+        self._total -= blob_size
+
+    def _ensure_shard(self, path: str) -> None:
+        shard = os.path.dirname(path)
+        if shard not in self._shards:
+            os.makedirs(shard, exist_ok=True)
+            self._shards.add(shard)
+
+    def _remove(self, keys: List[str]) -> int:
+        with self._lock, self._db:
+            for key in keys:
+                row = self._db.execute(
+                    "SELECT blob, ext, size FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self._release(key, *row)
+        return len(keys)
+
+    def _unlink(self, *paths: str) -> None:
+        """Rimuove il primo dei percorsi che esiste."""
+        for path in paths:
+            try:
+                os.remove(path)
+                return
+            except FileNotFoundError:
+                continue
+            except OSError as err:
+                _LOGGER.error("Errore durante la pulizia del file %s: %s", path, err)
+                return
+
+    def _link(self, src: str, dst: str) -> None:
+        """Hardlink di src in dst, copia atomica se non supportati."""
+        try:
+            os.link(src, dst)
+        except FileExistsError:
+            pass
+        except OSError:
+            with open(src, "rb") as f:
+                self._write_atomic(dst, f.read())
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        """Scrive su un file temporaneo e lo rinomina sul percorso finale.
+
+        Chi legge vede la clip completa o nessuna clip: un crash o due
+        scritture concorrenti non lasciano mai un MP3 troncato in cache.
+        """
+        fd, tmp = tempfile.mkstemp(dir=self._tmp_path, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _import_existing(self) -> None:
+        """Indicizza (una sola volta) i file creati prima dell'indice."""
+        rows = []
+        for root, dirs, files in os.walk(self._cache_path):
+            dirs[:] = [d for d in dirs if d != _TMP_DIR]
+            for name in files:
+                key, _, ext = name.rpartition(".")
+                if ext not in ("mp3", "ogg"):
+                    continue
+                st = os.stat(os.path.join(root, name))
+                rows.append((key, st.st_size, st.st_mtime, st.st_mtime, ext))
+
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO entries (key, size, created_at, last_access, ext) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+        if rows:
+            _LOGGER.info("ReversoTTS: indicizzati %s file di cache esistenti", len(rows))
@@ -0,0 +1,227 @@
+"""Indexed voice catalog for Reverso TTS integration.
+
+Costruito una sola volta all'import a partire da ``VOICES``: lingua,
+qualità e genere di ogni voce, insieme per la verifica e mappa
+lingua → voci. Le voci non valide si scartano o correggono qui, prima di
+qualsiasi richiesta di rete.
+"""
+from __future__ import annotations
+
+import difflib
+import logging
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .const import DEFAULT_VOICE_ID, LANGUAGE_DEFAULT_VOICE
+from .voices import VOICES
+
+_LOGGER = logging.getLogger(__name__)
+
+QUALITY_HQ = "HQ"
+QUALITY_NT = "NT"
+QUALITY_NEURAL = "Neural"
+
+GENDER_FEMALE = "female"
+GENDER_MALE = "male"
+
+# Gruppo di VOICES → codice lingua
+_GROUP_LANGUAGES = {
+    "Arabic": "ar-SA",
+    "Catalan": "ca-ES",
+    "Chinese": "zh-CN",
+    "Czech": "cs-CZ",
+    "Danish": "da-DK",
+    "Dutch": "nl-NL",
+    "Dutch (Belgium)": "nl-BE",
+    "English": "en-US",
+    "English (Australian)": "en-AU",
+    "English (Canada)": "en-CA",
+    "English (United Kingdom)": "en-GB",
+    "Faroese": "fo-FO",
+    "Finnish": "fi-FI",
+    "French": "fr-FR",
+    "French (Belgium)": "fr-BE",
+    "French (Canada)": "fr-CA",
+    "German": "de-DE",
+    "Greek": "el-GR",
+    "Hebrew": "he-IL",
+    "Hindi": "hi-IN",
+    "Indian English": "en-IN",
+    "Italian": "it-IT",
+    "Japanese": "ja-JP",
+    "Korean": "ko-KR",
+    "Norwegian": "nb-NO",
+    "Polish": "pl-PL",
+    "Portuguese": "pt-PT",
+    "Portuguese Brazilian": "pt-BR",
+    "Romanian": "ro-RO",
+    "Russian": "ru-RU",
+    "Spanish": "es-ES",
+    "Spanish (United States)": "es-US",
+}
+
+# Nomi delle voci maschili; tutte le altre voci del catalogo sono femminili
+_MALE_NAMES = frozenset({
+    "andreas", "andrew", "anthony", "antoine", "antonio", "avri", "bruno",
+    "daan", "darius", "dimitris", "emil", "graham", "hanus", "henri",
+    "jeroen", "klaus", "max", "mehdi", "micah", "nizar", "nizareng", "olav",
+    "peter", "piotr", "rasmus", "rod", "rodrigo", "ryan", "sergio", "tyler",
+    "vittorio", "will",
+})
+
+# Ordine di preferenza per la voce di default di una lingua
+_QUALITY_ORDER = (QUALITY_NT, QUALITY_HQ, QUALITY_NEURAL)
+
+
+@dataclass(frozen=True)
+class Voice:
+    """Una voce del catalogo."""
+
+    voice_id: str
+    group: str
+    language: str
+    quality: str
+    gender: str
+    name: str
+
+
+def _parse(voice_id: str, group: str) -> Voice:
+    if voice_id.endswith("Neural"):
+        # es. en-US-AndrewMultilingualNeural
+        lang_code, region, rest = voice_id.split("-", 2)
+        name = rest[: -len("Neural")].replace("Multilingual", "")
+        language, quality = f"{lang_code}-{region}", QUALITY_NEURAL
+    else:
+        # es. Vittorio22k_HQ, Margaux-BE22k_NT
+        base, _, quality = voice_id.rpartition("_")
+        name = base.split("22k")[0].split("-")[0]
+        language = _GROUP_LANGUAGES[group]
+
+    gender = GENDER_MALE if name.lower() in _MALE_NAMES else GENDER_FEMALE
+    return Voice(voice_id, group, language, quality, gender, name)
+
+
+VOICE_INFO: Dict[str, Voice] = {
+    voice_id: _parse(voice_id, group)
+    for group, voices in VOICES.items()
+    for voice_id in voices
+}
+
+VOICE_IDS: FrozenSet[str] = frozenset(VOICE_INFO)
+
+# Lista ordinata per l'options flow
+VOICE_CHOICES: List[str] = sorted(VOICE_IDS)
+
+# Payload dell'evento reversotts_voices
+VOICE_LIST: List[Dict[str, str]] = [
+    {
+        "group": voice.group,
+        "voice_id": voice.voice_id,
+        "language": voice.language,
+        "quality": voice.quality,
+        "gender": voice.gender,
+    }
+    for voice in VOICE_INFO.values()
+]
+
+_BY_LANGUAGE: Dict[str, List[str]] = {}
+for _voice in VOICE_INFO.values():
+    _BY_LANGUAGE.setdefault(_voice.language, []).append(_voice.voice_id)
+
+VOICES_BY_LANGUAGE: Dict[str, Tuple[str, ...]] = {
+    language: tuple(
+        sorted(ids, key=lambda v: (_QUALITY_ORDER.index(VOICE_INFO[v].quality), v))
+    )
+    for language, ids in _BY_LANGUAGE.items()
+}
+
+SUPPORT_LANGUAGES: List[str] = sorted(VOICES_BY_LANGUAGE)
+
+# Lingua → voce di default: preferenze di const, poi la prima per qualità
+DEFAULT_VOICES: Dict[str, str] = {
+    language: LANGUAGE_DEFAULT_VOICE.get(language, voices[0])
+    for language, voices in VOICES_BY_LANGUAGE.items()
+}
+
+_LANGUAGES_LOWER: Dict[str, str] = {language.lower(): language for language in SUPPORT_LANGUAGES}
+
+# Lingua principale (es. "it") → lingua completa, per "it" o "it-CH"
+_PRIMARY_LANGUAGES: Dict[str, str] = {}
+for _language in [*LANGUAGE_DEFAULT_VOICE, *SUPPORT_LANGUAGES]:
+    _PRIMARY_LANGUAGES.setdefault(_language.split("-")[0], _language)
+
+# Varianti tolleranti: maiuscole/minuscole e qualità mancante
+_FOLDED: Dict[str, str] = {voice_id.lower(): voice_id for voice_id in VOICE_IDS}
+for _language_voices in VOICES_BY_LANGUAGE.values():
+    # Già ordinate per qualità: senza suffisso vince la NT
+    for _voice_id in _language_voices:
+        if VOICE_INFO[_voice_id].quality != QUALITY_NEURAL:
+            _FOLDED.setdefault(_voice_id.rpartition("_")[0].lower(), _voice_id)
+
+
+def is_valid_voice(voice_id: Optional[str]) -> bool:
+    return voice_id in VOICE_IDS
+
+
+def match_language(language: Optional[str]) -> Optional[str]:
+    """Lingua del catalogo per un codice come ``it-IT``, ``it_it`` o ``it``."""
+    if not language:
+        return None
+    language = str(language).replace("_", "-").lower()
+    return _LANGUAGES_LOWER.get(language) or _PRIMARY_LANGUAGES.get(language.split("-")[0])
+
+
+def default_voice(language: Optional[str]) -> Optional[str]:
+    """Voce di default per la lingua, None se la lingua non è nel catalogo."""
+    language = match_language(language)
+    return DEFAULT_VOICES.get(language) if language else None
+
+
+def voice_language(voice_id: str) -> Optional[str]:
+    voice = VOICE_INFO.get(voice_id)
+    return voice.language if voice else None
+
+
+def resolve_voice(voice_id: Optional[str]) -> Optional[str]:
+    """Voce valida del catalogo, con correzione di maiuscole e suffisso.
+
+    ``vittorio22k_hq`` → ``Vittorio22k_HQ``, ``Vittorio22k`` →
+    ``Vittorio22k_NT``. None se la voce non esiste.
+    """
+    if not voice_id:
+        return None
+    voice_id = str(voice_id).strip()
+    if voice_id in VOICE_IDS:
+        return voice_id
+
+    resolved = _FOLDED.get(voice_id.lower())
+    if resolved is None:
+        # Errori di battitura: "Vitorio22k_HQ" → "Vittorio22k_HQ"
+        close = difflib.get_close_matches(voice_id.lower(), _FOLDED, n=1, cutoff=0.9)
+        resolved = _FOLDED[close[0]] if close else None
+    if resolved is not None:
+        _LOGGER.debug("ReversoTTS: voce %s corretta in %s", voice_id, resolved)
+    return resolved
+
+
+def select_voice(
+    language: Optional[str],
+    requested: Optional[str] = None,
+    configured: Optional[str] = None,
+) -> str:
+    """Voce da usare per una richiesta, sempre valida.
+
+    Ordine: voce richiesta, voce configurata se è della lingua richiesta,
+    voce di default della lingua, voce configurata, default interno.
+    """
+    if requested:
+        voice_id = resolve_voice(requested)
+        if voice_id is not None:
+            return voice_id
+        _LOGGER.warning("ReversoTTS: voce %s sconosciuta, uso la voce di default", requested)
+
+    configured = resolve_voice(configured)
+    if configured and (not language or voice_language(configured) == match_language(language)):
+        return configured
+
+    return default_voice(language) or configured or DEFAULT_VOICE_ID
@@ -8,11 +8,31 @@ from .const import (
     CONF_LANG,
     CONF_PITCH,
     CONF_BITRATE,
+    CONF_MEMORY_CACHE_MB,
+    CONF_MEMORY_CACHE_TTL,
+    CONF_DISK_CACHE_MB,
+    CONF_CACHE_POLICY,
+    CONF_CACHE_TTL_DAYS,
+    CONF_HEDGE_DELAY,
+    CONF_VERBALIZE_NUMBERS,
+    CONF_DETECT_LANGUAGE,
+    CONF_BASE_URL,
+    CONF_AUDIO_FORMAT,
     DEFAULT_LANG,
     DEFAULT_PITCH,
     DEFAULT_BITRATE,
+    DEFAULT_MEMORY_CACHE_MB,
+    DEFAULT_MEMORY_CACHE_TTL,
+    DEFAULT_DISK_CACHE_MB,
+    DEFAULT_CACHE_POLICY,
+    DEFAULT_CACHE_TTL_DAYS,
+    DEFAULT_HEDGE_DELAY,
+    DEFAULT_BASE_URL,
+    DEFAULT_AUDIO_FORMAT,
 )
-from .voices import VOICES
+from .audio import AUDIO_FORMATS, BITRATES, normalize_bitrate
+from .cache import CACHE_POLICIES
+from .catalog import VOICE_CHOICES
 
 
 class ReversoTTSConfigFlow(config_entries.ConfigFlow, domain="reversotts"):
@@ -51,20 +71,63 @@ class ReversoTTSOptionsFlow(config_entries.OptionsFlow):
         if user_input is not None:
             return self.async_create_entry(title="Opzioni Reverso TTS", data=user_input)
 
-        # Flatten all voices into a single list
-        all_voices = []
-        for lang_group in VOICES.values():
-            all_voices.extend(lang_group)
-
         # Usa l’attributo interno
-        default_voice = self._config_entry.options.get("voice_id", "Vittorio22k_NT")
+        options = self._config_entry.options
+        default_voice = options.get("voice_id", "Vittorio22k_NT")
 
         schema = vol.Schema(
             {
                 vol.Optional(
                     "voice_id",
                     default=default_voice,
-                ): vol.In(sorted(all_voices)),
+                ): vol.In(VOICE_CHOICES),
+                vol.Optional(
+                    CONF_MEMORY_CACHE_MB,
+                    default=options.get(CONF_MEMORY_CACHE_MB, DEFAULT_MEMORY_CACHE_MB),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=1024)),
+                vol.Optional(
+                    CONF_MEMORY_CACHE_TTL,
+                    default=options.get(CONF_MEMORY_CACHE_TTL, DEFAULT_MEMORY_CACHE_TTL),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_DISK_CACHE_MB,
+                    default=options.get(CONF_DISK_CACHE_MB, DEFAULT_DISK_CACHE_MB),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_CACHE_POLICY,
+                    default=options.get(CONF_CACHE_POLICY, DEFAULT_CACHE_POLICY),
+                ): vol.In(CACHE_POLICIES),
+                vol.Optional(
+                    CONF_CACHE_TTL_DAYS,
+                    default=options.get(CONF_CACHE_TTL_DAYS, DEFAULT_CACHE_TTL_DAYS),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_HEDGE_DELAY,
+                    default=options.get(CONF_HEDGE_DELAY, DEFAULT_HEDGE_DELAY),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=15)),
+                vol.Optional(
+                    CONF_VERBALIZE_NUMBERS,
+                    default=options.get(CONF_VERBALIZE_NUMBERS, False),
+                ): bool,
+                vol.Optional(
+                    CONF_DETECT_LANGUAGE,
+                    default=options.get(CONF_DETECT_LANGUAGE, False),
+                ): bool,
+                vol.Optional(
+                    CONF_AUDIO_FORMAT,
+                    default=options.get(CONF_AUDIO_FORMAT, DEFAULT_AUDIO_FORMAT),
+                ): vol.In(AUDIO_FORMATS),
+                vol.Optional(
+                    CONF_BITRATE,
+                    default=options.get(
+                        CONF_BITRATE,
+                        normalize_bitrate(self._config_entry.data.get(CONF_BITRATE)),
+                    ),
+                ): vol.In(BITRATES),
+                vol.Optional(
+                    CONF_BASE_URL,
+                    default=options.get(CONF_BASE_URL, DEFAULT_BASE_URL),
+                ): str,
             }
         )
 
@@ -1,22 +1,52 @@
 """Constants for Reverso TTS integration."""
 
+DOMAIN = "reversotts"
+
 CONF_PITCH = "pitch"        # reinterpretato come "speed"
-CONF_BITRATE = "bitrate"    # non usato dall'API moderna
+CONF_BITRATE = "bitrate"    # bitrate della clip (conversione locale con ffmpeg)
 CONF_LANG = "language"
+CONF_MEMORY_CACHE_MB = "memory_cache_mb"
+CONF_MEMORY_CACHE_TTL = "memory_cache_ttl"
+CONF_DISK_CACHE_MB = "disk_cache_mb"
+CONF_CACHE_POLICY = "cache_policy"
+CONF_CACHE_TTL_DAYS = "cache_ttl_days"
+CONF_HEDGE_DELAY = "hedge_delay"
+CONF_VERBALIZE_NUMBERS = "verbalize_numbers"
+CONF_BASE_URL = "base_url"
+CONF_AUDIO_FORMAT = "audio_format"
+CONF_DETECT_LANGUAGE = "detect_language"  # sceglie la voce dalla lingua del messaggio
+
+# Endpoint dell'API (configurabile, es. per un server locale di benchmark)
+DEFAULT_BASE_URL = "https://voice.reverso.net/api/v1/tts"
 
 DEFAULT_LANG = "it-IT"
 DEFAULT_PITCH = "1.0"
-DEFAULT_BITRATE = "128k"
+DEFAULT_BITRATE = "128k"           # MP3 a 128k = audio originale di Reverso
+DEFAULT_AUDIO_FORMAT = "mp3"       # "ogg" = Opus, convertito con ffmpeg
+DEFAULT_VOICE_ID = "Vittorio22k_HQ"  # default interno del servizio say
+FALLBACK_VOICE_ID = "Chiara22k_NT"    # voce di riserva se la principale fallisce
+
+# Secondi di attesa della voce principale prima di avviare in parallelo la
+# richiesta di riserva (0 = subito)
+DEFAULT_HEDGE_DELAY = 4.0
+
+# Sostituzioni di testo dell'utente (YAML "testo: sostituzione" nella cartella config)
+SUBSTITUTIONS_FILE = "reversotts_substitutions.yaml"
+
+# Cache RAM: budget in MB e TTL in ore (0 = nessuna scadenza)
+DEFAULT_MEMORY_CACHE_MB = 16
+DEFAULT_MEMORY_CACHE_TTL = 0
+
+# Cache disco: dimensione massima in MB (0 = illimitata), politica e TTL in giorni
+DEFAULT_DISK_CACHE_MB = 200
+DEFAULT_CACHE_POLICY = "lru"
+DEFAULT_CACHE_TTL_DAYS = 30
 
 # Opzioni supportate dal servizio TTS
 SUPPORT_OPTIONS = ["voice_id", "speed"]
 
-# Lingue supportate (per compatibilità Home Assistant)
-SUPPORT_LANGUAGES = [
-    "it-IT", "en-US", "en-GB", "fr-FR", "es-ES", "de-DE"
-]
-
-# Mappa lingua → voce di default
+# Voce di default preferita per lingua (le altre lingue del catalogo usano
+# la prima voce disponibile, vedi catalog.py)
 LANGUAGE_DEFAULT_VOICE = {
     "it-IT": "Vittorio22k_NT",
     "en-US": "Ryan22k_NT",
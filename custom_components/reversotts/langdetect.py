@@ -0,0 +1,233 @@
+"""Offline language detection for Reverso TTS integration.
+
+Modello a n-grammi di caratteri (fino a trigrammi) costruito all'import da brevi testi di
+esempio (parole frequenti e frasi tipiche degli annunci domestici); le
+lingue con alfabeto proprio si riconoscono direttamente dallo script.
+Serve solo a scegliere la voce giusta al primo tentativo: se il testo è
+troppo corto o ambiguo restituisce None e si usa la lingua configurata.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from functools import lru_cache
+import math
+import re
+import unicodedata
+from typing import Dict, Optional
+
+from .catalog import match_language
+
+# Sotto questa soglia di lettere il risultato non è affidabile
+MIN_LETTERS = 12
+
+# Differenza minima di log-probabilità media tra prima e seconda lingua
+MIN_MARGIN = 0.03
+
+_SAMPLES = {
+    "it": (
+        "il la lo le gli di che e un una per non con sono è della del nel alla "
+        "questo questa come anche più già stato stata tutto tutti ancora sempre "
+        "la lavatrice ha finito il ciclo di lavaggio. qualcuno ha suonato il "
+        "campanello alla porta. la temperatura in soggiorno è di ventuno gradi. "
+        "ricordati di chiudere le finestre prima di uscire. buongiorno, oggi "
+        "pioverà nel pomeriggio. l'allarme è stato attivato. la batteria del "
+        "sensore è quasi scarica. benvenuto a casa, la cena è pronta. movimento rilevato in cucina. la luce del bagno è ancora accesa. la porta del garage è aperta."
+    ),
+    "en": (
+        "the and of to a in is it you that was for on are with as this be at "
+        "have from or one had by but not what all were when we there can your "
+        "the washing machine has finished its cycle. someone is ringing the "
+        "doorbell at the front door. the living room temperature is twenty one "
+        "degrees. remember to close the windows before leaving. good morning, "
+        "it will rain this afternoon. the alarm has been armed. the sensor "
+        "battery is almost empty. welcome home, dinner is ready. motion detected in the kitchen. the bathroom light is still on. the garage door is open."
+    ),
+    "fr": (
+        "le la les de des du un une et est en que qui pour dans ce il elle pas "
+        "plus par sur avec au aux son ses nous vous sont été être avoir fait "
+        "la machine à laver a terminé son cycle. quelqu'un sonne à la porte "
+        "d'entrée. la température du salon est de vingt et un degrés. pensez à "
+        "fermer les fenêtres avant de sortir. bonjour, il pleuvra cet après-midi. "
+        "l'alarme est activée. la batterie du capteur est presque vide. "
+        "bienvenue à la maison, le dîner est prêt. mouvement détecté dans la cuisine. la lumière de la salle de bain est encore allumée. la porte du garage est ouverte."
+    ),
+    "es": (
+        "el la los las de del que y en un una es por con para no se su al lo "
+        "como más pero sus le ya o este sí porque esta entre cuando muy sin "
+        "la lavadora ha terminado el ciclo de lavado. alguien está llamando al "
+        "timbre de la puerta. la temperatura del salón es de veintiún grados. "
+        "recuerda cerrar las ventanas antes de salir. buenos días, esta tarde "
+        "lloverá. la alarma está activada. la batería del sensor está casi "
+        "vacía. bienvenido a casa, la cena está lista. movimiento detectado en la cocina. la luz del baño sigue encendida. la puerta del garaje está abierta."
+    ),
+    "pt": (
+        "o a os as de do da dos das que e em um uma é para com não se por mais "
+        "como mas foi ao ele ela seu sua ou quando muito já também só pelo "
+        "a máquina de lavar terminou o ciclo de lavagem. alguém está tocando a "
+        "campainha da porta. a temperatura da sala é de vinte e um graus. "
+        "lembre-se de fechar as janelas antes de sair. bom dia, vai chover à "
+        "tarde. o alarme foi ativado. a bateria do sensor está quase "
+        "descarregada. bem-vindo a casa, o jantar está pronto. movimento detectado na cozinha. a luz da casa de banho ainda está acesa. a porta da garagem está aberta."
+    ),
+    "ca": (
+        "el la els les de del dels que i en un una és per amb no es com més "
+        "però seu seva o quan molt ja també només aquest aquesta hem han "
+        "la rentadora ha acabat el cicle de rentat. algú està trucant al timbre "
+        "de la porta. la temperatura de la sala és de vint-i-un graus. recorda "
+        "tancar les finestres abans de sortir. bon dia, aquesta tarda plourà. "
+        "l'alarma s'ha activat. la bateria del sensor és gairebé buida. "
+        "benvingut a casa, el sopar és a punt. moviment detectat a la cuina. el llum del bany encara és encès. la porta del garatge és oberta."
+    ),
+    "ro": (
+        "și în de la cu un o pe care este nu din pentru că se mai sau ca lui "
+        "fost sunt au ce acest această foarte când după toate până prin "
+        "mașina de spălat a terminat ciclul de spălare. cineva sună la ușa de "
+        "la intrare. temperatura în sufragerie este de douăzeci și unu de grade. "
+        "nu uita să închizi ferestrele înainte de a pleca. bună dimineața, după-"
+        "amiază va ploua. alarma a fost activată. bateria senzorului este "
+        "aproape descărcată. bine ai venit acasă, cina este gata. mișcare detectată în bucătărie. lumina din baie este încă aprinsă. ușa garajului este deschisă."
+    ),
+    "de": (
+        "der die das und ist nicht ein eine zu den von mit sich des auf für im "
+        "dem auch es an als wie wir sie noch nach bei aus wenn schon über "
+        "die waschmaschine hat das programm beendet. jemand klingelt an der "
+        "haustür. die temperatur im wohnzimmer beträgt einundzwanzig grad. "
+        "denk daran, die fenster zu schließen, bevor du gehst. guten morgen, am "
+        "nachmittag wird es regnen. die alarmanlage ist aktiviert. die batterie "
+        "des sensors ist fast leer. willkommen zu hause, das essen ist fertig. bewegung in der küche erkannt. das licht im badezimmer ist noch an. das garagentor ist offen."
+    ),
+    "nl": (
+        "de het een en van in is dat op te zijn met voor niet aan er om ook "
+        "als bij nog wel maar naar dan uit hij zij wordt worden heeft hebben "
+        "de wasmachine is klaar met het programma. er wordt aangebeld bij de "
+        "voordeur. de temperatuur in de woonkamer is eenentwintig graden. "
+        "vergeet niet de ramen te sluiten voordat je weggaat. goedemorgen, "
+        "vanmiddag gaat het regenen. het alarm is ingeschakeld. de batterij "
+        "van de sensor is bijna leeg. welkom thuis, het eten is klaar. beweging gedetecteerd in de keuken. het licht in de badkamer is nog aan. de garagedeur staat open."
+    ),
+    "da": (
+        "og i at det er en til på som med af for ikke den har de var jeg der "
+        "men om et kan vil også efter være hvor skal ved over eller når "
+        "vaskemaskinen er færdig med programmet. der er nogen, der ringer på "
+        "døren. temperaturen i stuen er enogtyve grader. husk at lukke "
+        "vinduerne, før du går. godmorgen, i eftermiddag kommer der regn. "
+        "alarmen er slået til. batteriet i sensoren er næsten tomt. velkommen "
+        "hjem, maden er klar. bevægelse registreret i køkkenet. lyset i badeværelset er stadig tændt. garageporten er åben."
+    ),
+    "nb": (
+        "og i er det at en på til som med av for ikke den har de var jeg men "
+        "om et kan vil også etter være hvor skal ved over eller når ble blir "
+        "vaskemaskinen er ferdig med programmet. det er noen som ringer på "
+        "døren. temperaturen i stuen er tjueen grader. husk å lukke vinduene "
+        "før du går. god morgen, i ettermiddag blir det regn. alarmen er "
+        "slått på. batteriet i sensoren er nesten tomt. velkommen hjem, "
+        "middagen er klar. bevegelse oppdaget på kjøkkenet. lyset på badet er fortsatt på. garasjeporten er åpen."
+    ),
+    "fi": (
+        "ja on ei se että hän oli ovat mutta kun niin kuin myös sen tai jos "
+        "vain jo nyt hyvin kanssa koska sitten olla ole minä sinä me te he "
+        "pesukone on valmis. joku soittaa ovikelloa. olohuoneen lämpötila on "
+        "kaksikymmentäyksi astetta. muista sulkea ikkunat ennen kuin lähdet. "
+        "hyvää huomenta, iltapäivällä sataa. hälytys on kytketty päälle. "
+        "anturin akku on melkein tyhjä. tervetuloa kotiin, ruoka on valmis. liikettä havaittu keittiössä. kylpyhuoneen valo on vielä päällä. autotallin ovi on auki."
+    ),
+    "pl": (
+        "i w nie na się z do to że jest jak co ale po tak za od o jego już "
+        "przez tylko czy jeszcze może bardzo są był była było będzie gdy "
+        "pralka zakończyła program prania. ktoś dzwoni do drzwi wejściowych. "
+        "temperatura w salonie wynosi dwadzieścia jeden stopni. pamiętaj, aby "
+        "zamknąć okna przed wyjściem. dzień dobry, po południu będzie padać. "
+        "alarm został włączony. bateria czujnika jest prawie rozładowana. "
+        "witaj w domu, obiad jest gotowy. wykryto ruch w kuchni. światło w łazience jest nadal włączone. brama garażowa jest otwarta."
+    ),
+    "cs": (
+        "a v se na je že to s z do o jako ale by jsem jsou byl bylo už jeho "
+        "pro po tak také jen když který která které nebo podle při má mají "
+        "pračka dokončila program praní. někdo zvoní u vchodových dveří. "
+        "teplota v obývacím pokoji je dvacet jedna stupňů. nezapomeň zavřít "
+        "okna, než odejdeš. dobré ráno, odpoledne bude pršet. alarm byl "
+        "zapnut. baterie senzoru je téměř vybitá. vítej doma, večeře je hotová. v kuchyni byl zjištěn pohyb. světlo v koupelně stále svítí. garážová vrata jsou otevřená."
+    ),
+}
+
+# Lingue riconosciute dallo script (prima lettera trovata)
+_SCRIPTS = (
+    ("HIRAGANA", "ja"),
+    ("KATAKANA", "ja"),
+    ("HANGUL", "ko"),
+    ("CJK", "zh"),
+    ("ARABIC", "ar"),
+    ("HEBREW", "he"),
+    ("GREEK", "el"),
+    ("CYRILLIC", "ru"),
+    ("DEVANAGARI", "hi"),
+)
+
+_NON_LETTERS_RE = re.compile(r"[^\w']+|[\d_]+")
+
+
+def _ngrams(text: str) -> Counter:
+    """Unigrammi, bigrammi e trigrammi di ogni parola (con bordi)."""
+    counts: Counter = Counter()
+    for word in text.split():
+        padded = f" {word} "
+        for size in (1, 2, 3):
+            for i in range(len(padded) - size + 1):
+                counts[padded[i:i + size]] += 1
+    return counts
+
+
+def _build_model(sample: str) -> tuple[Dict[str, float], float]:
+    counts = _ngrams(_NON_LETTERS_RE.sub(" ", sample.lower()))
+    total = sum(counts.values())
+    vocabulary = len(counts) + 1
+    # Laplace: log-probabilità dei trigrammi visti e di quelli mai visti
+    probs = {gram: math.log((n + 1) / (total + vocabulary)) for gram, n in counts.items()}
+    return probs, math.log(1 / (total + vocabulary))
+
+
+_MODELS = {lang: _build_model(sample) for lang, sample in _SAMPLES.items()}
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFC", str(text)).lower()
+    return " ".join(_NON_LETTERS_RE.sub(" ", text).split())
+
+
+def _script_language(text: str) -> Optional[str]:
+    for char in text:
+        if char.isalpha() and not char.isascii():
+            name = unicodedata.name(char, "")
+            for script, lang in _SCRIPTS:
+                if name.startswith(script):
+                    return lang
+    return None
+
+
+def detect_language(text: str) -> Optional[str]:
+    """Lingua del catalogo (es. ``it-IT``) per il testo, None se incerta."""
+    return _detect(_normalize(text))
+
+
+@lru_cache(maxsize=1024)
+def _detect(text: str) -> Optional[str]:
+    """Rilevamento memoizzato sul testo normalizzato."""
+    lang = _script_language(text)
+    if lang is None:
+        if sum(char.isalpha() for char in text) < MIN_LETTERS:
+            return None
+
+        grams = _ngrams(text)
+        total = sum(grams.values())
+        scores = sorted(
+            (
+                sum(probs.get(gram, unseen) * n for gram, n in grams.items()) / total,
+                lang,
+            )
+            for lang, (probs, unseen) in _MODELS.items()
+        )
+        (best, lang), (second, _) = scores[-1], scores[-2]
+        if best - second < MIN_MARGIN:
+            return None
+
+    return match_language(lang)
@@ -0,0 +1,87 @@
+"""Runtime metrics for Reverso TTS integration."""
+from __future__ import annotations
+
+import bisect
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+# Contatori esposti da sensori e servizio reversotts.stats
+COUNTERS = (
+    "requests",
+    "ram_hits",
+    "disk_hits",
+    "inflight_hits",
+    "upstream_calls",
+    "upstream_errors",
+    "bytes_fetched",
+    "cloudflare_blocks",
+    "circuit_rejections",
+    "fallbacks",
+)
+
+# Limiti superiori (ms) delle classi dell'istogramma di latenza upstream
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Ultime misure tenute per il calcolo dei percentili
+LATENCY_WINDOW = 1000
+
+
+class Metrics:
+    """Contatori e istogramma di latenza del client.
+
+    Solo incrementi e append: va usato dal loop di Home Assistant e costa
+    praticamente nulla sul percorso di sintesi.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        self._window = window
+        self.reset()
+
+    def reset(self) -> None:
+        self.counters: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+        # Un bucket in più per le misure oltre l'ultimo limite
+        self._buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self._latencies: Deque[float] = deque(maxlen=self._window)
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        self.counters[name] += amount
+
+    def observe_latency(self, seconds: float) -> None:
+        """Registra la durata di una chiamata a Reverso."""
+        ms = seconds * 1000
+        self._buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self._latencies.append(ms)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Percentile (ms) sulle ultime chiamate, None se non ce ne sono."""
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+        return round(ordered[index], 1)
+
+    @property
+    def hit_ratio(self) -> Optional[float]:
+        """Quota di richieste servite senza chiamare Reverso."""
+        requests = self.counters["requests"]
+        if not requests:
+            return None
+        hits = (
+            self.counters["ram_hits"]
+            + self.counters["disk_hits"]
+            + self.counters["inflight_hits"]
+        )
+        return round(hits / requests, 3)
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"<={limit}" for limit in LATENCY_BUCKETS_MS] + [
+            f">{LATENCY_BUCKETS_MS[-1]}"
+        ]
+        return {
+            **self.counters,
+            "hit_ratio": self.hit_ratio,
+            "latency_p50_ms": self.percentile(50),
+            "latency_p90_ms": self.percentile(90),
+            "latency_p99_ms": self.percentile(99),
+            "latency_histogram_ms": dict(zip(labels, self._buckets)),
+        }
@@ -0,0 +1,52 @@
+"""Data models for Reverso TTS integration."""
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import Optional
+
+from .cache import make_cache_key, make_text_key
+
+
+@dataclass(frozen=True)
+class SynthesisRequest:
+    """Richiesta di sintesi immutabile.
+
+    Testo, voce, velocità e formato viaggiano insieme per tutta la pipeline
+    (cache, single-flight, segmenti, POST), quindi richieste concorrenti con
+    parametri diversi non possono mescolarsi. ``bitrate`` è None per l'MP3
+    originale di Reverso, altrimenti la clip va convertita.
+    """
+
+    text: str
+    voice_id: str
+    speed: float = 1.0
+    audio_format: str = "mp3"
+    bitrate: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        """Chiave di cache della richiesta."""
+        return make_cache_key(
+            self.text, self.voice_id, self.speed, self.audio_format, self.bitrate
+        )
+
+    @property
+    def text_key(self) -> str:
+        """Chiave del testo indipendente dalla voce."""
+        return make_text_key(self.text, self.speed, self.audio_format, self.bitrate)
+
+    @property
+    def transcoded(self) -> bool:
+        return self.bitrate is not None
+
+    def as_original(self) -> SynthesisRequest:
+        """Stessa richiesta nell'MP3 originale di Reverso (sorgente della conversione)."""
+        return replace(self, audio_format="mp3", bitrate=None)
+
+    def with_text(self, text: str) -> SynthesisRequest:
+        """Stessa richiesta per un altro testo (es. un segmento)."""
+        return replace(self, text=text)
+
+    def with_voice(self, voice_id: str) -> SynthesisRequest:
+        """Stessa richiesta con un'altra voce (es. fallback)."""
+        return replace(self, voice_id=voice_id)
@@ -0,0 +1,145 @@
+"""Prewarm of the Reverso TTS cache with known announcement phrases."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from homeassistant.core import HomeAssistant
+
+from .cache import normalize_speed
+from .catalog import resolve_voice
+from .const import DEFAULT_VOICE_ID, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+EVENT_PREWARM = "reversotts_prewarm"
+
+# File letto automaticamente all'avvio, se presente nella cartella config
+PREWARM_FILE = "reversotts_prewarm.yaml"
+
+# Richieste contemporanee verso Reverso durante il prewarm
+PREWARM_CONCURRENCY = 2
+
+
+def load_prewarm_file(path: str) -> Dict[str, Any]:
+    """Legge un file di frasi (eseguita nell'executor).
+
+    Formati accettati:
+    - ``.txt``: una frase per riga;
+    - YAML lista di frasi;
+    - YAML dizionario con ``messages`` e, opzionali, ``voice_id`` e ``speed``.
+    """
+    with open(path, encoding="utf-8") as f:
+        if not path.endswith((".yaml", ".yml")):
+            return {"messages": [line.strip() for line in f if line.strip()]}
+        data = yaml.safe_load(f) or {}
+
+    if isinstance(data, list):
+        return {"messages": data}
+    return data
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+async def async_prewarm(
+    hass: HomeAssistant,
+    messages: List[str],
+    voices: List[str],
+    speeds: List[Optional[float]],
+) -> None:
+    """Sintetizza in cache tutte le combinazioni messaggio × voce × velocità."""
+    client = hass.data[DOMAIN].get("client")
+    if client is None:
+        _LOGGER.warning("ReversoTTS prewarm: nessuna entry configurata, prewarm annullato")
+        return
+
+    disk_cache = hass.data[DOMAIN]["disk_cache"]
+    default_speed = hass.data[DOMAIN].get("speed", 1.0)
+
+    jobs = []
+    for message in messages:
+        if not str(message).strip():
+            continue
+        for voice_id in voices:
+            for speed in speeds:
+                jobs.append(
+                    client.request(str(message), voice_id, normalize_speed(speed, default_speed))
+                )
+
+    progress = {"total": len(jobs), "done": 0, "skipped": 0, "failed": 0}
+    semaphore = asyncio.Semaphore(PREWARM_CONCURRENCY)
+
+    async def _async_job(request) -> None:
+        async with semaphore:
+            if await hass.async_add_executor_job(disk_cache.contains, request.key):
+                progress["skipped"] += 1
+            elif await client.async_synthesize_request(request) is None:
+                progress["failed"] += 1
+
+            progress["done"] += 1
+            hass.bus.async_fire(
+                EVENT_PREWARM,
+                {
+                    **progress,
+                    "message": request.text,
+                    "voice_id": request.voice_id,
+                    "speed": request.speed,
+                },
+            )
+
+    _LOGGER.info("ReversoTTS prewarm: %s frasi da preparare", len(jobs))
+    await asyncio.gather(*(_async_job(job) for job in jobs))
+
+    hass.bus.async_fire(EVENT_PREWARM, {**progress, "finished": True})
+    _LOGGER.info(
+        "ReversoTTS prewarm completato: %s generate, %s già in cache, %s fallite",
+        progress["done"] - progress["skipped"] - progress["failed"],
+        progress["skipped"],
+        progress["failed"],
+    )
+
+
+async def async_prewarm_from_data(hass: HomeAssistant, data: Dict[str, Any]) -> None:
+    """Prewarm a partire dai dati del servizio o del file di avvio."""
+    messages = _as_list(data.get("messages"))
+
+    if data.get("file"):
+        path = hass.config.path(data["file"])
+        try:
+            file_data = await hass.async_add_executor_job(load_prewarm_file, path)
+        except (OSError, yaml.YAMLError) as err:
+            _LOGGER.error("ReversoTTS prewarm: impossibile leggere %s: %s", path, err)
+            return
+        messages += _as_list(file_data.get("messages"))
+        data = {**file_data, **{k: v for k, v in data.items() if v is not None}}
+
+    voices = []
+    for voice_id in _as_list(data.get("voice_id")):
+        resolved = resolve_voice(voice_id)
+        if resolved is None:
+            _LOGGER.warning("ReversoTTS prewarm: voce %s sconosciuta, ignorata", voice_id)
+        elif resolved not in voices:
+            voices.append(resolved)
+    if not voices:
+        voices = [resolve_voice(hass.data[DOMAIN].get("voice_id")) or DEFAULT_VOICE_ID]
+    speeds = _as_list(data.get("speed")) or [None]
+
+    await async_prewarm(hass, messages, voices, speeds)
+
+
+async def async_prewarm_at_startup(hass: HomeAssistant) -> None:
+    """Esegue il prewarm del file di avvio, se esiste."""
+    path = hass.config.path(PREWARM_FILE)
+    if not await hass.async_add_executor_job(os.path.exists, path):
+        return
+    await async_prewarm_from_data(hass, {"file": PREWARM_FILE})
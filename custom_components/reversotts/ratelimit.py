@@ -0,0 +1,106 @@
+"""Upstream rate limiting and circuit breaker for Reverso TTS integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class TokenBucket:
+    """Token bucket: al più ``rate`` richieste al secondo, con burst ``capacity``.
+
+    Va usato solo dal loop di Home Assistant.
+    """
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Attende che sia disponibile un token e lo consuma."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated) * self._rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+class CircuitBreaker:
+    """Interrompe le chiamate a Reverso dopo blocchi Cloudflare, 429 o 5xx.
+
+    Ad ogni fallimento consecutivo il circuito resta aperto per un tempo
+    esponenziale con jitter; scaduto il tempo passa una sola richiesta di
+    prova (half-open): se va bene il circuito si richiude, altrimenti si
+    riapre con un'attesa doppia. Va usato solo dal loop di Home Assistant.
+    """
+
+    def __init__(self, base_delay: float, max_delay: float) -> None:
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._failures = 0
+        self._state = STATE_CLOSED
+        self._open_until = 0.0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def retry_in(self) -> float:
+        """Secondi mancanti alla prossima richiesta di prova."""
+        return max(0.0, self._open_until - time.monotonic())
+
+    def allow(self) -> bool:
+        """True se la richiesta può partire."""
+        if self._state == STATE_CLOSED:
+            return True
+        if self._state == STATE_OPEN and time.monotonic() >= self._open_until:
+            # Una sola richiesta di prova, le altre falliscono subito
+            self._state = STATE_HALF_OPEN
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self._state != STATE_CLOSED:
+            _LOGGER.info("ReversoTTS: servizio di nuovo raggiungibile, circuito chiuso")
+        self._failures = 0
+        self._state = STATE_CLOSED
+
+    def record_failure(self, min_delay: Optional[float] = None) -> None:
+        """Apre il circuito; ``min_delay`` (es. Retry-After) fa da limite inferiore."""
+        self._failures += 1
+        delay = min(self._max_delay, self._base_delay * 2 ** (self._failures - 1))
+        # Jitter: evita che tutti i client riprovino nello stesso istante
+        delay = random.uniform(delay / 2, delay)
+        if min_delay:
+            delay = max(delay, min(min_delay, self._max_delay))
+
+        self._state = STATE_OPEN
+        self._open_until = time.monotonic() + delay
+        _LOGGER.warning(
+            "ReversoTTS: circuito aperto per %.0f secondi (%s errori consecutivi)",
+            delay,
+            self._failures,
+        )
+
+    def release_probe(self) -> None:
+        """La richiesta di prova è finita senza esito utile: riprova al prossimo giro."""
+        if self._state == STATE_HALF_OPEN:
+            self._state = STATE_OPEN
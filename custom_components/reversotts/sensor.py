@@ -0,0 +1,124 @@
+"""Diagnostic sensors for Reverso TTS integration."""
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any, Optional
+
+from homeassistant.components.sensor import (
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN
+
+# Le metriche sono in memoria: leggerle costa poco
+SCAN_INTERVAL = timedelta(seconds=60)
+
+# Entry che espone i sensori (hass.data[DOMAIN]): le metriche sono del client
+# condiviso, uguali per tutte le entry
+METRICS_ENTRY = "metrics_entry"
+
+SENSORS = (
+    SensorEntityDescription(
+        key="ram_hits", name="RAM cache hits", state_class=SensorStateClass.TOTAL_INCREASING
+    ),
+    SensorEntityDescription(
+        key="disk_hits", name="Disk cache hits", state_class=SensorStateClass.TOTAL_INCREASING
+    ),
+    SensorEntityDescription(
+        key="hit_ratio",
+        name="Cache hit ratio",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key="upstream_calls", name="Upstream calls", state_class=SensorStateClass.TOTAL_INCREASING
+    ),
+    SensorEntityDescription(
+        key="upstream_errors", name="Upstream errors", state_class=SensorStateClass.TOTAL_INCREASING
+    ),
+    SensorEntityDescription(
+        key="latency_p50_ms",
+        name="Upstream latency p50",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key="latency_p99_ms",
+        name="Upstream latency p99",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key="bytes_fetched",
+        name="Bytes fetched",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    SensorEntityDescription(
+        key="cloudflare_blocks", name="Cloudflare blocks", state_class=SensorStateClass.TOTAL_INCREASING
+    ),
+    SensorEntityDescription(
+        key="fallbacks", name="Fallbacks", state_class=SensorStateClass.TOTAL_INCREASING
+    ),
+    SensorEntityDescription(
+        key="evictions", name="Cache evictions", state_class=SensorStateClass.TOTAL_INCREASING
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    # Un solo insieme di sensori, creato dalla prima entry caricata
+    owner = hass.data[DOMAIN].setdefault(METRICS_ENTRY, config_entry.entry_id)
+    if owner != config_entry.entry_id:
+        # Sensori duplicati creati in passato da questa entry
+        registry = er.async_get(hass)
+        for entity in er.async_entries_for_config_entry(registry, config_entry.entry_id):
+            if entity.domain == "sensor":
+                registry.async_remove(entity.entity_id)
+        return
+
+    # Scaricata l'entry, i sensori passano alla prossima entry caricata
+    config_entry.async_on_unload(lambda: hass.data[DOMAIN].pop(METRICS_ENTRY, None))
+    async_add_entities(
+        ReversoMetricSensor(hass, config_entry, description) for description in SENSORS
+    )
+
+
+class ReversoMetricSensor(SensorEntity):
+    """Una metrica del client Reverso, letta dal client condiviso."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        description: SensorEntityDescription,
+    ) -> None:
+        self.hass = hass
+        self.entity_description = description
+        self._attr_name = f"Reverso TTS {description.name}"
+        self._attr_unique_id = f"reversotts_{config_entry.entry_id}_{description.key}"
+
+    @property
+    def native_value(self) -> Optional[Any]:
+        # Il client viene creato dalla piattaforma tts: fino ad allora nessun valore
+        client = self.hass.data[DOMAIN].get("client")
+        if client is None:
+            return None
+
+        value = client.stats().get(self.entity_description.key)
+        if self.entity_description.key == "hit_ratio" and value is not None:
+            return round(value * 100, 1)
+        return value
@@ -0,0 +1,174 @@
+"""Text helpers for Reverso TTS integration."""
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+from .verbalize import verbalize
+
+# Lunghezza massima di un segmento inviato a Reverso in una sola richiesta
+CHUNK_MAX_CHARS = 250
+
+# Fine frase (. ! ? … ; e a capo), poi pause più deboli (, :) e infine spazi
+_SENTENCE_RE = re.compile(r"(?<=[.!?…;])\s+|\n+")
+_CLAUSE_RE = re.compile(r"(?<=[,:])\s+")
+_SPACE_RE = re.compile(r"\s+")
+
+# Segnaposto dei template: {nome}
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+# Punteggiatura in testa a una parte fissa e testo pronunciabile
+_LEADING_PUNCT_RE = re.compile(r"[.,;:!?…]*")
+_WORD_RE = re.compile(r"\w")
+
+# Virgolette tipografiche, trattini e spazi speciali → ASCII
+_CHAR_MAP = str.maketrans({
+    "“": "\"", "”": "\"", "„": "\"", "«": "\"", "»": "\"",
+    "‘": "'", "’": "'", "‚": "'", "`": "'",
+    "–": "-", "—": "-", "‐": "-", "−": "-",
+    "…": "...",
+    "\u00a0": " ", "\u202f": " ", "\u2009": " ",
+})
+_WHITESPACE_RE = re.compile(r"\s+")
+_SPACE_BEFORE_PUNCT_RE = re.compile(r"\s+([,.;:!?])")
+_REPEATED_PUNCT_RE = re.compile(r"([!?])\1+")
+# Decimali nulli: 21.0 / 21,0 / 21,00 → 21. Solo questi: "10.30", "7.50" e
+# "10.00" sono orari, "2024.10" una versione, e si leggono come sono scritti
+_TRAILING_ZEROS_RE = re.compile(r"(?<![\d.,])(\d+)(?:[.,]0|,00)(?!\d|[.,]\d)")
+
+
+class TextNormalizer:
+    """Pipeline di normalizzazione del testo, applicata prima di payload e chiave.
+
+    Passi: NFC, virgolette/trattini, numeri canonici, sostituzioni utente,
+    verbalizzazione opzionale di numeri e date, spazi e punteggiatura.
+    Le sostituzioni non sono idempotenti (``tv`` → ``la tv``): il testo va
+    normalizzato una sola volta, da ``ReversoTTSClient.request``, così
+    servizio ``say`` ed entità producono la stessa chiave.
+    """
+
+    def __init__(
+        self,
+        substitutions: Optional[Dict[str, str]] = None,
+        verbalize_numbers: bool = False,
+        language: Optional[str] = None,
+    ) -> None:
+        # Testo letterale, sostituito solo come parola intera (anche "°C") e
+        # rispettando maiuscole e minuscole: "HA" non tocca "ha finito"
+        self._substitutions = [
+            (re.compile(rf"(?<!\w){re.escape(source)}(?!\w)"), str(replacement))
+            for source, replacement in (substitutions or {}).items()
+            if source
+        ]
+        self.configure(verbalize_numbers, language)
+
+    def configure(self, verbalize_numbers: bool = False, language: Optional[str] = None) -> None:
+        self._verbalize = verbalize_numbers
+        self._language = language
+
+    def __call__(self, text: str, language: Optional[str] = None) -> str:
+        text = unicodedata.normalize("NFC", str(text)).translate(_CHAR_MAP)
+        text = _TRAILING_ZEROS_RE.sub(r"\1", text)
+
+        for pattern, replacement in self._substitutions:
+            text = pattern.sub(replacement, text)
+
+        if self._verbalize:
+            text = verbalize(text, language or self._language)
+
+        text = _WHITESPACE_RE.sub(" ", text)
+        text = _SPACE_BEFORE_PUNCT_RE.sub(r"\1", text)
+        text = _REPEATED_PUNCT_RE.sub(r"\1", text)
+        return text.strip()
+
+
+def render_template(template: str, variables: Dict[str, object]) -> str:
+    """Testo completo del template, da cui si ricava la chiave della clip.
+
+    È lo stesso testo che si otterrebbe passando il messaggio già composto
+    (servizio ``say`` con ``message`` o entità TTS): la clip unita dai
+    frammenti è condivisa con quelle richieste. Solleva ValueError se manca
+    una variabile.
+    """
+    def _value(match: re.Match) -> str:
+        if match.group(1) not in variables:
+            raise ValueError(f"Variabile {match.group(1)} mancante per il template")
+        return str(variables[match.group(1)])
+
+    return _PLACEHOLDER_RE.sub(_value, template)
+
+
+def split_template(template: str, variables: Dict[str, object]) -> List[str]:
+    """Divide un template nei frammenti fissi e nei valori delle variabili.
+
+    ``"Lavatrice finita in {minuti} minuti"`` con ``{"minuti": 42}`` diventa
+    ``["Lavatrice finita in", "42", "minuti"]``: le parti fisse restano
+    uguali tra un annuncio e l'altro e possono essere riusate dalla cache.
+    La punteggiatura all'inizio di una parte fissa resta attaccata al
+    frammento precedente (``"Ciao {nome}!"`` → ``["Ciao", "Anna!"]``) e
+    nessun frammento è fatto di sola punteggiatura. Solleva ValueError se
+    manca una variabile.
+    """
+    pieces: List[str] = []
+    pos = 0
+    for match in _PLACEHOLDER_RE.finditer(template):
+        name = match.group(1)
+        if name not in variables:
+            raise ValueError(f"Variabile {name} mancante per il template")
+        pieces.append(template[pos:match.start()])
+        pieces.append(str(variables[name]))
+        pos = match.end()
+    pieces.append(template[pos:])
+
+    fragments: List[str] = []
+    for index, piece in enumerate(pieces):
+        piece = piece.strip()
+        # Parti fisse (indici pari) dopo un segnaposto: la punteggiatura
+        # iniziale chiude il valore precedente
+        if index % 2 == 0 and fragments:
+            punct = _LEADING_PUNCT_RE.match(piece)[0]
+            fragments[-1] += punct
+            piece = piece[len(punct):].strip()
+        if _WORD_RE.search(piece):
+            fragments.append(piece)
+    return fragments
+
+
+def split_text(text: str, max_chars: int = CHUNK_MAX_CHARS) -> List[str]:
+    """Divide il testo in segmenti di al più ``max_chars`` caratteri.
+
+    Si spezza ai confini di frase, poi alla punteggiatura debole e solo in
+    ultima istanza agli spazi. Un testo già abbastanza corto viene restituito
+    intatto, così un segmento non viene mai suddiviso di nuovo.
+    """
+    text = text.strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    chunks: List[str] = []
+    for pattern in (_SENTENCE_RE, _CLAUSE_RE, _SPACE_RE):
+        pieces = [p for p in pattern.split(text) if p.strip()]
+        if len(pieces) > 1:
+            break
+    else:
+        # Nessun separatore: taglio netto
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+
+    current = ""
+    for piece in pieces:
+        piece = piece.strip()
+        candidate = f"{current} {piece}" if current else piece
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        if current:
+            chunks.append(current)
+        if len(piece) > max_chars:
+            chunks.extend(split_text(piece, max_chars))
+            current = ""
+        else:
+            current = piece
+    if current:
+        chunks.append(current)
+
+    return chunks
@@ -1,13 +1,14 @@
 """Support for the Reverso TTS speech service (API v1)."""
 from __future__ import annotations
 
+import asyncio
 import logging
-import hashlib
-import os
-from typing import Any, Dict, Optional
+import time
+from collections import Counter
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
 
+import aiohttp
 import voluptuous as vol
-import requests
 
 from homeassistant.components.tts import (
     CONF_LANG,
@@ -16,9 +17,20 @@ from homeassistant.components.tts import (
     TextToSpeechEntity,
     TtsAudioType,
 )
+
+try:
+    from homeassistant.components.tts import TTSAudioRequest, TTSAudioResponse
+except ImportError:
+    # Core senza streaming TTS: async_stream_tts_audio non viene mai chiamato
+    TTSAudioRequest = TTSAudioResponse = None
+from homeassistant.components.ffmpeg import get_ffmpeg_manager
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.typing import ConfigType
 
 from .const import (
@@ -27,15 +39,83 @@ from .const import (
     DEFAULT_BITRATE,
     DEFAULT_LANG,
     DEFAULT_PITCH,
-    SUPPORT_LANGUAGES,
     SUPPORT_OPTIONS,
-    LANGUAGE_DEFAULT_VOICE,
+    CONF_MEMORY_CACHE_MB,
+    CONF_MEMORY_CACHE_TTL,
+    DEFAULT_MEMORY_CACHE_MB,
+    DEFAULT_MEMORY_CACHE_TTL,
+    CONF_HEDGE_DELAY,
+    DEFAULT_HEDGE_DELAY,
+    FALLBACK_VOICE_ID,
+    CONF_BASE_URL,
+    DEFAULT_BASE_URL,
+    CONF_AUDIO_FORMAT,
+    DEFAULT_AUDIO_FORMAT,
+    CONF_DETECT_LANGUAGE,
 )
 from . import DOMAIN
+from .audio import (
+    async_transcode,
+    concat_mp3,
+    needs_transcode,
+    normalize_bitrate,
+    strip_tags,
+)
+from .cache import DiskCache, MemoryCache, normalize_speed
+from .catalog import SUPPORT_LANGUAGES, select_voice
+from .langdetect import detect_language
+from .metrics import Metrics
+from .models import SynthesisRequest
+from .ratelimit import CircuitBreaker, TokenBucket
+from .text import TextNormalizer, split_template, split_text
 
 _LOGGER = logging.getLogger(__name__)
 
-REVERSO_BASE_URL = "https://voice.reverso.net/api/v1/tts"
+REVERSO_TIMEOUT = aiohttp.ClientTimeout(total=15)
+
+# Dimensione dei blocchi inoltrati durante lo streaming
+STREAM_CHUNK_SIZE = 4096
+
+# Numero massimo di POST verso Reverso in parallelo (es. segmenti di testo lungo).
+# Il semaforo copre solo la richiesta di rete: un frammento che a sua volta
+# si divide in segmenti non trattiene un permesso mentre attende gli altri.
+MAX_PARALLEL_CHUNKS = 3
+
+# Limite di richieste verso Reverso (token bucket) e backoff del circuit breaker
+RATE_LIMIT_PER_SECOND = 2.0
+RATE_LIMIT_BURST = 5
+BACKOFF_BASE_DELAY = 10
+BACKOFF_MAX_DELAY = 1800
+CLOUDFLARE_MIN_DELAY = 300
+
+# Istantanea delle clip più usate (.storage/reversotts_warm), salvata alla
+# chiusura e usata all'avvio per ricaricare in RAM le WARM_TOP_N più usate.
+# Ad ogni riavvio i punteggi precedenti valgono WARM_DECAY: conta l'uso recente.
+WARM_STORE_KEY = "reversotts_warm"
+WARM_STORE_VERSION = 1
+WARM_TOP_N = 100
+WARM_SNAPSHOT_KEYS = 500
+WARM_TRACKED_KEYS = 4096
+WARM_DECAY = 0.5
+
+# Gli hit in RAM non toccano il disco: vengono riportati nell'indice (ultimo
+# accesso e numero di hit) a lotti, al più ogni TOUCH_FLUSH_DELAY secondi,
+# così LRU, LFU e TTL non sacrificano proprio le clip più usate
+TOUCH_FLUSH_DELAY = 30
+
+# 🔥 HEADERS ORIGINALI FUNZIONANTI
+REVERSO_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "*/*",
+    "Origin": "https://voice.reverso.net",
+    "Referer": "https://voice.reverso.net/text-to-speech",
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.6099.71 Safari/537.36"
+    ),
+    "apikey": "test-api-key-123456",
+}
 
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     {
@@ -50,128 +130,770 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
 # Utility: resolve voice ID
 # ---------------------------------------------------------------------------
 
-def _resolve_voice_id(language: str | None, options: Dict[str, Any] | None, default_voice: str) -> str:
-    """Determina il voice_id da usare."""
-    if options and "voice_id" in options:
-        return str(options["voice_id"])
-
-    if language in LANGUAGE_DEFAULT_VOICE:
-        return LANGUAGE_DEFAULT_VOICE[language]
-
-    return default_voice
+def _resolve_voice_id(language: str | None, options: Dict[str, Any] | None, configured: str | None) -> str:
+    """Determina il voice_id da usare, verificato sul catalogo (nessuna chiamata di rete)."""
+    return select_voice(language, (options or {}).get("voice_id"), configured)
 
 
 # ---------------------------------------------------------------------------
 # Reverso API v1 client + CACHE
 # ---------------------------------------------------------------------------
 
-class ReversoTTSClient:
-    """Client per Reverso TTS API v1 con caching RAM + disco."""
+class ReversoTTSError(Exception):
+    """Richiesta a Reverso fallita."""
 
-    def __init__(self, hass: HomeAssistant, speed: float = 1.0, audio_format: str = "mp3") -> None:
-        self._speed = speed
-        self._format = audio_format
-        self._cache = {}  # RAM cache
+
+class ReversoTTSClient:
+    """Client per Reverso TTS API v1 con caching RAM + disco.
+
+    Le richieste usano la sessione aiohttp condivisa di Home Assistant, così
+    le connessioni keep-alive verso voice.reverso.net vengono riutilizzate
+    e nessun thread dell'executor resta bloccato in attesa della rete.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        speed: float = 1.0,
+        audio_format: str = "mp3",
+        memory_cache_mb: float = DEFAULT_MEMORY_CACHE_MB,
+        memory_cache_ttl: float = DEFAULT_MEMORY_CACHE_TTL,
+        base_url: str = DEFAULT_BASE_URL,
+        bitrate: Optional[str] = None,
+    ) -> None:
+        # RAM cache LRU limitata in byte (TTL in ore, 0 = nessuna scadenza)
+        self._cache = MemoryCache(0)
+        self.configure(speed, audio_format, memory_cache_mb, memory_cache_ttl, base_url, bitrate)
         self._hass = hass
-        self._cache_path = hass.data[DOMAIN]["cache_path"]
+        self._disk_cache: DiskCache = hass.data[DOMAIN]["disk_cache"]
+        self._normalizer: TextNormalizer = hass.data[DOMAIN]["normalizer"]
+        self._session = async_get_clientsession(hass)
+        self._inflight: Dict[str, asyncio.Future] = {}  # key → richiesta in corso
+        self._chunk_semaphore = asyncio.Semaphore(MAX_PARALLEL_CHUNKS)
+        # Protezione del servizio: limite di richieste e circuit breaker
+        self._rate_limiter = TokenBucket(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+        self._breaker = CircuitBreaker(BACKOFF_BASE_DELAY, BACKOFF_MAX_DELAY)
+        self.metrics = Metrics()
+        # Frequenza d'uso delle clip, dall'avvio e dall'istantanea precedente
+        self._access: Counter = Counter()
+        self._previous: Dict[str, float] = {}
+        self._store = Store(hass, WARM_STORE_VERSION, WARM_STORE_KEY)
+        # Hit in RAM non ancora riportati nell'indice del disco
+        self._touches: Counter = Counter()
+        self._touch_unsub: Optional[Callable[[], None]] = None
+
+    def configure(
+        self,
+        speed: float = 1.0,
+        audio_format: str = "mp3",
+        memory_cache_mb: float = DEFAULT_MEMORY_CACHE_MB,
+        memory_cache_ttl: float = DEFAULT_MEMORY_CACHE_TTL,
+        base_url: str = DEFAULT_BASE_URL,
+        bitrate: Optional[str] = None,
+    ) -> None:
+        """Applica le opzioni di un'entry senza ricreare cache e sessione."""
+        self._base_url = base_url.rstrip("/")
+        # Valori di default: ogni chiamata può sovrascriverli senza toccare il client
+        self._speed = normalize_speed(speed)
+        self._format = audio_format
+        self._bitrate = normalize_bitrate(bitrate)
+        self._cache.configure(
+            int(memory_cache_mb * 1024 * 1024),
+            ttl=memory_cache_ttl * 3600 if memory_cache_ttl else None,
+        )
 
-    def synthesize(self, text: str, voice_id: str) -> Optional[bytes]:
-        # Calcolo chiave basato su voce, velocità e testo
-        key = hashlib.sha1(f"{voice_id}|{self._speed}|{text}".encode()).hexdigest()
-        cache_file = os.path.join(self._cache_path, f"{key}.mp3")
+    def view(
+        self, speed: float = 1.0, audio_format: Optional[str] = None, bitrate: Optional[str] = None
+    ) -> ReversoTTSView:
+        return ReversoTTSView(self, speed, audio_format, bitrate)
+
+    # -----------------------------------------------------------------------
+    # Cache RAM calda al riavvio
+    # -----------------------------------------------------------------------
+
+    def _track(self, key: str) -> None:
+        self._access[key] += 1
+        if len(self._access) > WARM_TRACKED_KEYS:
+            # Tiene solo le chiavi più usate: la memoria resta limitata
+            self._access = Counter(dict(self._access.most_common(WARM_TRACKED_KEYS // 2)))
+
+    def _popularity(self) -> Dict[str, float]:
+        """Punteggio per chiave: uso da questo avvio più quello passato attenuato."""
+        scores = {key: score * WARM_DECAY for key, score in self._previous.items()}
+        for key, count in self._access.items():
+            scores[key] = scores.get(key, 0) + count
+        top = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return {key: round(score, 3) for key, score in top[:WARM_SNAPSHOT_KEYS] if score >= 0.01}
+
+    def _touch(self, key: str) -> None:
+        self._touches[key] += 1
+        if self._touch_unsub is None:
+            self._touch_unsub = async_call_later(
+                self._hass, TOUCH_FLUSH_DELAY, self._async_flush_touches
+            )
+
+    async def _async_flush_touches(self, _now: Any = None) -> None:
+        self._touch_unsub = None
+        touches, self._touches = self._touches, Counter()
+        if touches:
+            await self._hass.async_add_executor_job(self._disk_cache.touch_many, dict(touches))
+
+    async def async_flush(self) -> None:
+        """Riporta subito nell'indice gli hit in RAM in sospeso (es. alla chiusura)."""
+        if self._touch_unsub is not None:
+            self._touch_unsub()
+        await self._async_flush_touches()
+
+    async def async_save_snapshot(self) -> None:
+        await self._store.async_save({"keys": self._popularity()})
+
+    async def async_restore(self) -> None:
+        """Ricarica in RAM le clip più usate prima del riavvio (in background)."""
+        data = await self._store.async_load()
+        self._previous = dict((data or {}).get("keys") or {})
+        keys = sorted(self._previous, key=self._previous.__getitem__, reverse=True)[:WARM_TOP_N]
+        if not keys:
+            # Nessuna istantanea (es. primo avvio): le clip con più hit su disco
+            keys = await self._hass.async_add_executor_job(self._disk_cache.most_used, WARM_TOP_N)
+
+        clips = await self._hass.async_add_executor_job(
+            self._disk_cache.load_many, keys, self._cache.max_bytes
+        )
+        # Dalla meno usata alla più usata: le più richieste sono le ultime a
+        # uscire dall'LRU. Le clip già richieste nel frattempo restano dove sono.
+        for key, audio in reversed(clips):
+            if key not in self._cache:
+                self._cache.put(key, audio)
+        _LOGGER.debug("ReversoTTS: %d clip ricaricate in RAM dall'avvio precedente", len(clips))
+
+    def stats(self) -> Dict[str, Any]:
+        """Metriche del client e delle cache (senza I/O)."""
+        memory = self._cache.stats()
+        return {
+            **self.metrics.snapshot(),
+            "evictions": memory["evictions"] + self._disk_cache.evictions,
+            "circuit": self._breaker.state,
+            "memory_cache": memory,
+        }
 
-        # 1) CACHE DISCO
-        if os.path.exists(cache_file):
-            _LOGGER.debug("ReversoTTS disk cache hit: %s", cache_file)
-            with open(cache_file, "rb") as f:
-                return f.read()
+    async def async_stats(self) -> Dict[str, Any]:
+        """Come stats(), più lo stato della cache disco letto dall'indice."""
+        disk = await self._hass.async_add_executor_job(self._disk_cache.stats)
+        return {**self.stats(), "disk_cache": disk}
+
+    def request(
+        self,
+        text: str,
+        voice_id: str,
+        speed: Optional[float] = None,
+        audio_format: Optional[str] = None,
+        language: Optional[str] = None,
+        bitrate: Optional[str] = None,
+        normalize: bool = True,
+    ) -> SynthesisRequest:
+        """Crea una richiesta normalizzando il testo e completando i default.
+
+        ``normalize=False`` solo per testo già normalizzato: la normalizzazione
+        non è idempotente e va applicata una volta sola.
+        """
+        audio_format = audio_format or self._format
+        bitrate = normalize_bitrate(bitrate) if bitrate else self._bitrate
+        return SynthesisRequest(
+            text=self._normalizer(text, language) if normalize else text,
+            voice_id=voice_id,
+            speed=self._speed if speed is None else normalize_speed(speed, self._speed),
+            audio_format=audio_format,
+            bitrate=bitrate if needs_transcode(audio_format, bitrate) else None,
+        )
 
-        # 2) CACHE RAM
-        if key in self._cache:
+    async def async_synthesize_request(
+        self,
+        request: SynthesisRequest,
+        resolve: Optional[Callable[[SynthesisRequest], Awaitable[Optional[bytes]]]] = None,
+    ) -> Optional[bytes]:
+        """Audio della richiesta: RAM, richiesta già in corso, poi ``resolve``.
+
+        ``resolve`` (default: disco, poi Reverso) viene eseguito una sola volta
+        per chiave anche con chiamanti concorrenti.
+        """
+        # Calcolo chiave basato su voce, velocità, formato e testo
+        key = request.key
+        self.metrics.incr("requests")
+        self._track(key)
+
+        # 1) CACHE RAM: controllata per prima, nessuna syscall
+        audio = self._cache.get(key)
+        if audio is not None:
             _LOGGER.debug("ReversoTTS RAM cache hit: %s", key)
-            return self._cache[key]
+            self.metrics.incr("ram_hits")
+            self._touch(key)
+            return audio
+
+        # Single-flight: richieste identiche concorrenti (es. broadcast su più
+        # speaker) attendono la stessa richiesta upstream e ne condividono i byte.
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._hass.async_create_task(
+                (resolve or self._async_resolve)(request),
+                f"reversotts_synthesize_{key}",
+            )
+            if not task.done():
+                self._inflight[key] = task
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            _LOGGER.debug("ReversoTTS in-flight hit: %s", key)
+            self.metrics.incr("inflight_hits")
+
+        # shield: se un chiamante viene cancellato gli altri ricevono comunque l'audio
+        return await asyncio.shield(task)
+
+    async def _async_resolve(self, request: SynthesisRequest) -> Optional[bytes]:
+        """Cerca l'audio in cache o lo scarica da Reverso (una sola volta per chiave)."""
+        key = request.key
+
+        # 2) CACHE DISCO (lookup sull'indice)
+        audio = await self._hass.async_add_executor_job(self._disk_cache.get, key)
+        if audio is not None:
+            _LOGGER.debug("ReversoTTS disk cache hit: %s", key)
+            self.metrics.incr("disk_hits")
+            self._cache.put(key, audio)
+            return audio
+
+        # 3) Formato convertito: si parte dall'MP3 originale (a sua volta in cache)
+        if request.transcoded:
+            source = await self.async_synthesize_request(request.as_original())
+            audio = await self._async_transcode(request, source) if source else None
+            if audio is not None:
+                await self._async_store(request, audio)
+            return audio
+
+        # 4) API CALL (testi lunghi: segmenti in parallelo, ognuno in cache)
+        chunks = split_text(request.text)
+        if len(chunks) > 1:
+            audio = await self._async_synthesize_chunks(request, chunks)
+        else:
+            audio = await self._async_fetch(request)
+        if audio is None:
+            return None
+
+        await self._async_store(request, audio)
+        return audio
+
+    async def _async_store(self, request: SynthesisRequest, audio: bytes) -> str:
+        """Salva la clip in RAM e su disco, restituisce il percorso per /local."""
+        self._cache.put(request.key, audio)
+        return await self._hass.async_add_executor_job(
+            self._disk_cache.put,
+            request.key,
+            audio,
+            request.voice_id,
+            request.speed,
+            len(request.text),
+            request.text_key,
+            request.audio_format,
+        )
+
+    async def _async_transcode(self, request: SynthesisRequest, audio: bytes) -> Optional[bytes]:
+        """Converte l'MP3 originale nel formato e bitrate della richiesta."""
+        return await async_transcode(
+            get_ffmpeg_manager(self._hass).binary,
+            audio,
+            request.audio_format,
+            request.bitrate,
+        )
+
+    async def async_publish(self, request: SynthesisRequest, audio: bytes) -> Optional[str]:
+        """Garantisce la clip su disco e ne restituisce il percorso per /local.
 
-        # 3) API CALL
-        url = f"{REVERSO_BASE_URL}/{voice_id}"
+        Serve quando l'audio arriva dalla RAM ma il file è stato rimosso
+        dalla cache disco nel frattempo.
+        """
+        # L'uso è già contato dal livello che ha fornito l'audio
+        relpath = await self._hass.async_add_executor_job(
+            self._disk_cache.locate, request.key, False
+        )
+        if relpath is None:
+            relpath = await self._async_store(request, audio)
+        return relpath
+
+    async def async_synthesize_playable(
+        self,
+        request: SynthesisRequest,
+        fallback_voice: str,
+        hedge_delay: float = DEFAULT_HEDGE_DELAY,
+    ) -> tuple[SynthesisRequest, Optional[bytes]]:
+        """Audio pronto da riprodurre e la richiesta che ne descrive il formato.
+
+        La riserva scatta solo se Reverso non fornisce l'MP3: una conversione
+        ffmpeg non riuscita (es. ffmpeg senza libopus) non è un guasto della
+        voce e ripiega sull'MP3 originale, senza altre chiamate a Reverso.
+        """
+        if not request.transcoded:
+            audio, _ = await self._async_hedged(request, fallback_voice, hedge_delay)
+            return request, audio
+
+        # Clip già convertita in cache: nessuna sintesi né conversione
+        if request.key in self._cache or await self._hass.async_add_executor_job(
+            self._disk_cache.contains, request.key
+        ):
+            audio = await self.async_synthesize_request(request)
+            if audio is not None:
+                return request, audio
+
+        original = request.as_original()
+        source, primary = await self._async_hedged(original, fallback_voice, hedge_delay)
+        if source is None:
+            return request, None
+
+        if primary:
+            # L'MP3 è in cache: la conversione lo riusa e salva la clip convertita
+            audio = await self.async_synthesize_request(request)
+        else:
+            # Audio della voce di riserva: convertito ma non salvato sotto questa chiave
+            audio = await self._async_transcode(request, source)
+
+        if audio is None:
+            _LOGGER.warning(
+                "ReversoTTS: conversione in %s non riuscita, uso l'MP3 originale",
+                request.audio_format,
+            )
+            return original, source
+        return request, audio
+
+    async def _async_hedged(
+        self,
+        request: SynthesisRequest,
+        fallback_voice: str,
+        hedge_delay: float,
+    ) -> tuple[Optional[bytes], bool]:
+        """Sintesi con richiesta di riserva "hedged".
+
+        Se la voce principale non risponde entro ``hedge_delay`` secondi (o
+        fallisce prima), parte in parallelo la riserva; vince il primo
+        risultato valido. Il tempo massimo resta quello di una sola richiesta.
+        Restituisce l'audio e se ha vinto la voce principale.
+        """
+        primary = self._hass.async_create_task(
+            self.async_synthesize_request(request), "reversotts_primary"
+        )
+        done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+        if done and primary.result():
+            return primary.result(), True
 
-        # FIX 400: Velocità come numero (punto decimale)
+        fallback = self._start_fallback(request, fallback_voice)
+        pending = {primary, fallback}
         try:
-            speed_val = float(str(self._speed).replace(",", "."))
-            if speed_val < 0.5 or speed_val > 2.0:
-                speed_val = 1.0
-        except:
-            speed_val = 1.0
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.result():
+                        return task.result(), task is primary
+        finally:
+            # La richiesta perdente continua in background (è protetta da
+            # shield) e finisce comunque in cache
+            for task in pending:
+                task.cancel()
+
+        return None, False
+
+    def _start_fallback(self, request: SynthesisRequest, fallback_voice: str) -> asyncio.Task:
+        _LOGGER.warning("ReversoTTS: fallback attivato → %s", fallback_voice)
+        self.metrics.incr("fallbacks")
+        return self._hass.async_create_task(
+            self.async_synthesize_fallback(request, fallback_voice),
+            "reversotts_fallback",
+        )
+
+    async def async_synthesize_fallback(
+        self, request: SynthesisRequest, fallback_voice: str
+    ) -> Optional[bytes]:
+        """Riserva: stessa frase già in cache in qualsiasi voce, poi voce di riserva."""
+        key = await self._hass.async_add_executor_job(
+            self._disk_cache.find_by_text, request.text_key
+        )
+        if key is not None and key != request.key:
+            audio = await self._hass.async_add_executor_job(self._disk_cache.get, key)
+            if audio is not None:
+                _LOGGER.debug("ReversoTTS: fallback dalla cache (%s)", key)
+                return audio
+
+        if fallback_voice == request.voice_id:
+            return None
+        return await self.async_synthesize_request(request.with_voice(fallback_voice))
+
+    async def _async_synthesize_chunks(
+        self, request: SynthesisRequest, chunks: List[str]
+    ) -> Optional[bytes]:
+        """Sintetizza i segmenti con parallelismo limitato e unisce i frame MP3."""
+        _LOGGER.debug("ReversoTTS: testo lungo diviso in %s segmenti", len(chunks))
+        return await self._async_synthesize_parts(
+            [request.with_text(chunk) for chunk in chunks]
+        )
+
+    async def _async_synthesize_parts(
+        self, requests: List[SynthesisRequest]
+    ) -> Optional[bytes]:
+        """Sintetizza più frammenti (ognuno in cache) e li unisce in ordine."""
+        parts = await asyncio.gather(
+            *(self.async_synthesize_request(request) for request in requests)
+        )
+        if any(part is None for part in parts):
+            return None
+
+        return concat_mp3(parts)
+
+    async def async_synthesize_template(
+        self,
+        request: SynthesisRequest,
+        template: str,
+        variables: Dict[str, Any],
+        language: Optional[str] = None,
+    ) -> Optional[bytes]:
+        """Sintesi di un template: parti fisse e variabili come frammenti separati.
+
+        ``request`` è la richiesta del messaggio completo (``render_template``):
+        la clip unita viene salvata sotto la sua chiave, la stessa del
+        messaggio già composto. Le parti fisse vengono sintetizzate una volta
+        per voce e velocità; per ogni annuncio serve al più il frammento
+        variabile (spesso già in cache, es. i numeri).
+        """
+        # I frammenti restano nell'MP3 originale: si uniscono senza ricodifica
+        fragments = [
+            self.request(
+                fragment, request.voice_id, request.speed, language=language
+            ).as_original()
+            for fragment in split_template(template, variables)
+        ]
+        # Single-flight sulla chiave completa: annunci concorrenti uniscono
+        # i frammenti una volta sola
+        return await self.async_synthesize_request(
+            request, lambda full: self._async_resolve_template(full, fragments)
+        )
+
+    async def _async_resolve_template(
+        self, request: SynthesisRequest, fragments: List[SynthesisRequest]
+    ) -> Optional[bytes]:
+        """Come _async_resolve, ma senza clip in cache unisce i frammenti."""
+        audio = await self._hass.async_add_executor_job(self._disk_cache.get, request.key)
+        if audio is not None:
+            self.metrics.incr("disk_hits")
+            self._cache.put(request.key, audio)
+            return audio
+
+        audio = await self._async_synthesize_parts(fragments)
+        if audio is not None and request.transcoded:
+            audio = await self._async_transcode(request, audio)
+        if audio is not None:
+            await self._async_store(request, audio)
+        return audio
+
+    async def async_stream_request(self, request: SynthesisRequest) -> AsyncIterator[bytes]:
+        """Restituisce l'audio a blocchi man mano che arriva da Reverso.
+
+        Le clip già in cache vengono emesse in un solo blocco; altrimenti i
+        byte della risposta (o dei segmenti, in ordine) vengono inoltrati
+        subito e la clip completa viene salvata in cache alla fine.
+        """
+        if request.transcoded:
+            # La conversione richiede la clip intera: un solo blocco
+            audio = await self.async_synthesize_request(request)
+            if audio is not None:
+                yield audio
+            return
+
+        key = request.key
+        self.metrics.incr("requests")
+        self._track(key)
+
+        audio = self._cache.get(key)
+        if audio is not None:
+            self.metrics.incr("ram_hits")
+            self._touch(key)
+            yield audio
+            return
+
+        task = self._inflight.get(key)
+        if task is not None:
+            _LOGGER.debug("ReversoTTS in-flight hit: %s", key)
+            self.metrics.incr("inflight_hits")
+            audio = await asyncio.shield(task)
+            if audio is not None:
+                yield audio
+            return
+
+        # Registrata prima della lettura dal disco: chi chiede la stessa clip
+        # nel frattempo attende questa richiesta invece di aprirne un'altra
+        future: asyncio.Future = self._hass.loop.create_future()
+        self._inflight[key] = future
+        try:
+            audio = await self._hass.async_add_executor_job(self._disk_cache.get, key)
+            if audio is not None:
+                self.metrics.incr("disk_hits")
+                self._cache.put(key, audio)
+                # Libera subito chi attende, senza aspettare il consumatore
+                del self._inflight[key]
+                future.set_result(audio)
+                yield audio
+                return
+
+            chunks = split_text(request.text)
+            if len(chunks) > 1:
+                source = self._async_stream_chunks(request, chunks)
+            else:
+                source = self._async_fetch_stream(request)
+
+            received = []
+            try:
+                async for data in source:
+                    received.append(data)
+                    yield data
+            except ReversoTTSError:
+                return
+
+            audio = b"".join(received)
+            await self._async_store(request, audio)
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            if not future.done():
+                future.set_result(audio)
+
+    async def async_stream_hedged(
+        self,
+        request: SynthesisRequest,
+        fallback_voice: str,
+        hedge_delay: float = DEFAULT_HEDGE_DELAY,
+    ) -> AsyncIterator[bytes]:
+        """Streaming con riserva "hedged", come _async_hedged.
+
+        Se il primo blocco della voce principale non arriva entro
+        ``hedge_delay`` secondi (o lo stream finisce senza audio), parte in
+        parallelo la riserva e vince chi produce audio per primo. Arrivato il
+        primo blocco, lo stream principale prosegue senza riserva.
+        """
+        stream = self.async_stream_request(request)
+        primary = self._hass.async_create_task(
+            _async_first_chunk(stream), "reversotts_stream_primary"
+        )
+        fallback: Optional[asyncio.Task] = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+            if not done or primary.result() is None:
+                fallback = self._start_fallback(request, fallback_voice)
+                pending = {fallback} if done else {primary, fallback}
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if fallback in done and fallback.result():
+                        yield fallback.result()
+                        return
+                    if primary in done and primary.result() is not None:
+                        break
+                else:
+                    return
+
+            if fallback is not None:
+                fallback.cancel()
+            yield primary.result()
+            async for data in stream:
+                yield data
+        finally:
+            # Lo stream perdente si interrompe; la riserva perdente continua
+            # in background (è protetta da shield) e finisce comunque in cache
+            if fallback is not None:
+                fallback.cancel()
+            if not primary.done():
+                primary.cancel()
+                await asyncio.wait({primary})
+            await stream.aclose()
+
+    async def _async_stream_chunks(
+        self, request: SynthesisRequest, chunks: List[str]
+    ) -> AsyncIterator[bytes]:
+        """Sintetizza i segmenti in parallelo ed emette i frame MP3 in ordine."""
+        tasks = [
+            self._hass.async_create_task(
+                self.async_synthesize_request(request.with_text(chunk)),
+                "reversotts_chunk",
+            )
+            for chunk in chunks
+        ]
+        try:
+            for task in tasks:
+                part = await task
+                if part is None:
+                    raise ReversoTTSError("Segmento non disponibile")
+                yield strip_tags(part)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _async_fetch(self, request: SynthesisRequest) -> Optional[bytes]:
+        """Esegue la POST verso Reverso riutilizzando il pool di connessioni."""
+        async with self._chunk_semaphore:
+            try:
+                return b"".join(
+                    [data async for data in self._async_fetch_stream(request)]
+                )
+            except ReversoTTSError:
+                return None
+
+    async def _async_fetch_stream(self, request: SynthesisRequest) -> AsyncIterator[bytes]:
+        """POST verso Reverso: inoltra i byte della risposta appena arrivano.
+
+        Solleva ReversoTTSError se la richiesta fallisce.
+        """
+        voice_id = request.voice_id
+        url = f"{self._base_url}/{voice_id}"
 
         # FIX 400: Payload con campi obbligatori
         payload = {
-            "text": text,
-            "speed": speed_val,
+            "text": request.text,
+            "speed": request.speed,  # FIX 400: Velocità come numero
             "voiceName": voice_id,
-            "format": self._format
+            "format": request.audio_format
         }
 
-        # 🔥 HEADERS ORIGINALI FUNZIONANTI
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "*/*",
-            "Origin": "https://voice.reverso.net",
-            "Referer": "https://voice.reverso.net/text-to-speech",
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0.6099.71 Safari/537.36"
-            ),
-            "apikey": "test-api-key-123456",
-        }
+        # Circuito aperto: niente rete, si fallisce subito (la cache è già stata controllata)
+        if not self._breaker.allow():
+            _LOGGER.debug(
+                "ReversoTTS: circuito aperto, richiesta saltata (riprova tra %.0f s)",
+                self._breaker.retry_in,
+            )
+            self.metrics.incr("circuit_rejections")
+            raise ReversoTTSError("Circuito aperto")
 
-        resp = None
         try:
-            # Ripristiniamo la chiamata semplice che funzionava
-            resp = requests.post(url, json=payload, headers=headers, timeout=15)
-            
-            # Controllo Cloudflare
-            if "Just a moment..." in resp.text:
-                _LOGGER.error("ReversoTTS: Bloccato da Cloudflare. Attendi 30 minuti prima di riprovare.")
-                return None
-                
-            resp.raise_for_status()
-        except Exception as err:
+            await self._rate_limiter.acquire()
+            self.metrics.incr("upstream_calls")
+            started = time.monotonic()
+            async with self._session.post(
+                url, json=payload, headers=REVERSO_HEADERS, timeout=REVERSO_TIMEOUT
+            ) as resp:
+                if resp.status != 200 or resp.content_type.startswith("text/"):
+                    body = await resp.read()
+
+                    # Controllo Cloudflare
+                    if b"Just a moment..." in body:
+                        _LOGGER.error("ReversoTTS: Bloccato da Cloudflare. Attendi 30 minuti prima di riprovare.")
+                        self.metrics.incr("cloudflare_blocks")
+                        self._breaker.record_failure(CLOUDFLARE_MIN_DELAY)
+                        raise ReversoTTSError("Bloccato da Cloudflare")
+
+                    self.metrics.incr("upstream_errors")
+                    _LOGGER.error("Reverso TTS HTTP error: %s", resp.status)
+                    _LOGGER.error("Dettagli errore API: %s", body[:300].decode(errors="replace"))
+                    if resp.status == 429 or resp.status >= 500:
+                        self._breaker.record_failure(_retry_after(resp))
+                    else:
+                        # 4xx "normale" (es. voce errata): il servizio risponde
+                        self._breaker.record_success()
+                    raise ReversoTTSError(f"HTTP {resp.status}")
+
+                self._breaker.record_success()
+                async for data in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+                    self.metrics.incr("bytes_fetched", len(data))
+                    yield data
+                self.metrics.observe_latency(time.monotonic() - started)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
             _LOGGER.error("Reverso TTS Fallito per voce %s: %s", voice_id, err)
-            if resp is not None:
-                _LOGGER.error("Dettagli errore API: %s", resp.text[:300])
-            return None
+            self.metrics.incr("upstream_errors")
+            self._breaker.record_failure()
+            raise ReversoTTSError(str(err)) from err
+        finally:
+            # Richiesta di prova interrotta senza esito (es. cancellata)
+            self._breaker.release_probe()
+
+
+class ReversoTTSView:
+    """Impostazioni di un'entry (o del provider YAML) sul client condiviso.
+
+    Contiene solo i default delle richieste: sessione, cache, single-flight,
+    rate limiter e circuit breaker restano quelli del client, unici per
+    tutto il processo.
+    """
+
+    __slots__ = ("client", "speed", "audio_format", "bitrate")
+
+    def __init__(
+        self,
+        client: ReversoTTSClient,
+        speed: float = 1.0,
+        audio_format: Optional[str] = None,
+        bitrate: Optional[str] = None,
+    ) -> None:
+        self.client = client
+        self.speed = normalize_speed(speed)
+        self.audio_format = audio_format
+        self.bitrate = bitrate
+
+    def request(
+        self,
+        text: str,
+        voice_id: str,
+        speed: Optional[float] = None,
+        language: Optional[str] = None,
+    ) -> SynthesisRequest:
+        return self.client.request(
+            text,
+            voice_id,
+            self.speed if speed is None else speed,
+            self.audio_format,
+            language,
+            self.bitrate,
+        )
 
-        if resp.status_code != 200:
-            _LOGGER.error("Reverso TTS HTTP error: %s", resp.status_code)
-            return None
 
-        audio = resp.content
+def async_get_client(hass: HomeAssistant) -> ReversoTTSClient:
+    """Client unico del processo, creato al primo uso.
 
-        # Salva in RAM
-        self._cache[key] = audio
+    Entry e provider YAML ne ricevono una vista: aggiungere entry non
+    aggiunge cache RAM, connessioni o limiti verso Reverso.
+    """
+    client = hass.data[DOMAIN].get("client")
+    if client is None:
+        client = hass.data[DOMAIN]["client"] = ReversoTTSClient(hass)
 
-        # Salva su disco
-        with open(cache_file, "wb") as f:
-            f.write(audio)
+        # Cache RAM calda: caricata senza ritardare il setup, salvata alla chiusura
+        hass.async_create_background_task(client.async_restore(), "reversotts_warm_restore")
 
-        return audio
+        async def _async_on_stop(_event: Event) -> None:
+            await client.async_flush()
+            await client.async_save_snapshot()
 
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_on_stop)
+    return client
 
-# ---------------------------------------------------------------------------
-# YAML setup
-# ---------------------------------------------------------------------------
 
-def get_engine(config: ConfigType, discovery_info=None) -> Provider:
-    lang = config[CONF_LANG]
-    pitch_str = config[CONF_PITCH]
+async def _async_first_chunk(stream: AsyncIterator[bytes]) -> Optional[bytes]:
+    """Primo blocco di uno stream, None se finisce senza audio."""
+    try:
+        return await stream.__anext__()
+    except StopAsyncIteration:
+        return None
 
+
+def _retry_after(resp: aiohttp.ClientResponse) -> Optional[float]:
+    """Valore dell'header Retry-After in secondi, se presente."""
     try:
-        speed = float(pitch_str)
-    except Exception:
-        speed = 1.0
+        return float(resp.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
 
-    client = ReversoTTSClient(speed=speed)
-    return ReversoProvider(lang, speed, client)
+# ---------------------------------------------------------------------------
+# YAML setup
+# ---------------------------------------------------------------------------
+
+async def async_get_engine(
+    hass: HomeAssistant, config: ConfigType, discovery_info=None
+) -> Provider:
+    speed = normalize_speed(config[CONF_PITCH])
+    view = async_get_client(hass).view(speed, bitrate=config.get(CONF_BITRATE))
+    return ReversoProvider(config[CONF_LANG], view)
 
 
 # ---------------------------------------------------------------------------
@@ -185,17 +907,26 @@ async def async_setup_entry(
 ) -> None:
 
     lang = config_entry.data[CONF_LANG]
-    pitch_str = config_entry.data[CONF_PITCH]
-
-    try:
-        speed = float(pitch_str)
-    except Exception:
-        speed = 1.0
-
-    client = ReversoTTSClient(hass, speed=speed)
+    speed = normalize_speed(config_entry.data[CONF_PITCH])
+    audio_format = config_entry.options.get(CONF_AUDIO_FORMAT, DEFAULT_AUDIO_FORMAT)
+    bitrate = config_entry.options.get(
+        CONF_BITRATE, config_entry.data.get(CONF_BITRATE, DEFAULT_BITRATE)
+    )
+
+    # Client condiviso: limiti globali e default dei servizi del dominio
+    # (es. reversotts.say) seguono l'ultima entry configurata
+    client = async_get_client(hass)
+    client.configure(
+        speed=speed,
+        memory_cache_mb=config_entry.options.get(CONF_MEMORY_CACHE_MB, DEFAULT_MEMORY_CACHE_MB),
+        memory_cache_ttl=config_entry.options.get(CONF_MEMORY_CACHE_TTL, DEFAULT_MEMORY_CACHE_TTL),
+        base_url=config_entry.options.get(CONF_BASE_URL) or DEFAULT_BASE_URL,
+        audio_format=audio_format,
+        bitrate=bitrate,
+    )
 
     async_add_entities([
-        ReversoTTSEntity(lang, speed, client, config_entry)
+        ReversoTTSEntity(lang, client.view(speed, audio_format, bitrate), config_entry)
     ])
 
 
@@ -207,11 +938,14 @@ class ReversoTTSEntity(TextToSpeechEntity):
 
     _attr_name = "Reverso TTS"
 
-    def __init__(self, lang: str, speed: float, client: ReversoTTSClient, config_entry: ConfigEntry):
+    def __init__(self, lang: str, view: ReversoTTSView, config_entry: ConfigEntry):
         self._lang = lang
-        self._speed = speed
-        self._client = client
+        self._speed = view.speed
+        self._view = view
+        self._client = view.client
         self._config_entry = config_entry
+        self._hedge_delay = config_entry.options.get(CONF_HEDGE_DELAY, DEFAULT_HEDGE_DELAY)
+        self._detect_language = config_entry.options.get(CONF_DETECT_LANGUAGE, False)
 
         self._attr_unique_id = f"reversotts_{config_entry.entry_id}"
 
@@ -227,60 +961,73 @@ class ReversoTTSEntity(TextToSpeechEntity):
     def supported_options(self):
         return SUPPORT_OPTIONS
 
-    def get_tts_audio(self, message, language, options=None) -> TtsAudioType:
+    def _prepare(
+        self, message: str, language: str | None, options: Dict[str, Any] | None
+    ) -> SynthesisRequest:
+        """Normalizza il messaggio e crea la richiesta con voce e velocità risolte."""
         lang = language or self._lang
 
+        # Voce non indicata: la lingua del messaggio sceglie la voce
+        if self._detect_language and not (options or {}).get("voice_id"):
+            lang = detect_language(message) or lang
+
         voice_id = _resolve_voice_id(
             lang,
             options,
-            self._config_entry.options.get("voice_id", "Vittorio22k_NT")
+            self._config_entry.options.get("voice_id")
         )
 
         # -------------------------------------------------------------------
         # 🎚️ OVERRIDE DINAMICO SPEED
         # -------------------------------------------------------------------
-        speed = self._speed
+        # Valore mancante o non valido → velocità di default dell'entry
+        speed = normalize_speed((options or {}).get("speed"), self._speed)
 
-        if options and "speed" in options:
-            raw_speed = options.get("speed")
-
-            if raw_speed is None or raw_speed == "":
-                # Nessuna velocità specificata → usa quella di default
-                pass
-            else:
-                try:
-                    speed = float(raw_speed)
-                except Exception:
-                    _LOGGER.warning("ReversoTTS: valore speed non valido (%s), uso %s", raw_speed, speed)
-
-        # PATCH: aggiorna correttamente la velocità nel client
-        self._client._speed = speed
-
-        # Normalizza virgolette tipografiche
-        message = (
-            message.replace("“", "\"")
-                   .replace("”", "\"")
-                   .replace("‘", "'")
-                   .replace("’", "'")
-        )
+        # La velocità viaggia nella richiesta: il client condiviso non viene modificato.
+        # Il testo viene normalizzato dal client (stessa pipeline del servizio say)
+        return self._view.request(message, voice_id, speed, language=lang)
 
-        # -------------------------------------------------------------------
-        # 🔊 GENERAZIONE AUDIO
-        # -------------------------------------------------------------------
-        audio = self._client.synthesize(message, voice_id)
+    async def async_get_tts_audio(self, message, language, options=None) -> TtsAudioType:
+        request = self._prepare(message, language, options)
 
         # -------------------------------------------------------------------
-        # 🔄 FALLBACK AUTOMATICO
+        # 🔊 GENERAZIONE AUDIO + 🔄 FALLBACK AUTOMATICO (hedged)
         # -------------------------------------------------------------------
-        if not audio:
-            fallback_voice = "Chiara22k_NT"
-            _LOGGER.warning("ReversoTTS: fallback attivato → %s", fallback_voice)
-            audio = self._client.synthesize(message, fallback_voice)
+        # Il formato restituito è quello effettivo: MP3 se la conversione fallisce
+        request, audio = await self._client.async_synthesize_playable(
+            request, FALLBACK_VOICE_ID, self._hedge_delay
+        )
 
         if not audio:
             return (None, None)
 
-        return ("mp3", audio)
+        return (request.audio_format, audio)
+
+    async def async_stream_tts_audio(self, request: TTSAudioRequest) -> TTSAudioResponse:
+        """Streaming: la riproduzione parte prima che la sintesi sia finita."""
+        message = "".join([chunk async for chunk in request.message_gen])
+        synth_request = self._prepare(message, request.language, request.options)
+
+        if synth_request.transcoded:
+            # La conversione richiede la clip intera: va risolta prima di
+            # dichiarare il formato (MP3 se la conversione non riesce)
+            synth_request, audio = await self._client.async_synthesize_playable(
+                synth_request, FALLBACK_VOICE_ID, self._hedge_delay
+            )
+
+            async def _async_clip_gen() -> AsyncIterator[bytes]:
+                if audio:
+                    yield audio
+
+            return TTSAudioResponse(synth_request.audio_format, _async_clip_gen())
+
+        # 🔄 FALLBACK AUTOMATICO (hedged): stesso budget di async_get_tts_audio
+        return TTSAudioResponse(
+            synth_request.audio_format,
+            self._client.async_stream_hedged(
+                synth_request, FALLBACK_VOICE_ID, self._hedge_delay
+            ),
+        )
 
 
 # ---------------------------------------------------------------------------
@@ -289,10 +1036,10 @@ class ReversoTTSEntity(TextToSpeechEntity):
 
 class ReversoProvider(Provider):
 
-    def __init__(self, lang: str, speed: float, client: ReversoTTSClient):
+    def __init__(self, lang: str, view: ReversoTTSView):
         self._lang = lang
-        self._speed = speed
-        self._client = client
+        self._view = view
+        self._client = view.client
         self.name = "Reverso TTS"
 
     @property
@@ -307,31 +1054,20 @@ class ReversoProvider(Provider):
     def supported_options(self):
         return SUPPORT_OPTIONS
 
-    def get_tts_audio(self, message, language, options=None) -> TtsAudioType:
+    async def async_get_tts_audio(self, message, language, options=None) -> TtsAudioType:
         lang = language or self._lang
 
         voice_id = _resolve_voice_id(
             lang,
             options,
-            LANGUAGE_DEFAULT_VOICE.get(lang, "Vittorio22k_NT")
+            None,
         )
 
-        # Normalizza virgolette tipografiche
-        message = (
-            message.replace("“", "\"")
-                   .replace("”", "\"")
-                   .replace("‘", "'")
-                   .replace("’", "'")
+        request, audio = await self._client.async_synthesize_playable(
+            self._view.request(message, voice_id, language=lang), FALLBACK_VOICE_ID
         )
 
-        audio = self._client.synthesize(message, voice_id)
-
-        if not audio:
-            fallback_voice = "Chiara22k_NT"
-            _LOGGER.warning("ReversoTTS (YAML): fallback attivato → %s", fallback_voice)
-            audio = self._client.synthesize(message, fallback_voice)
-
         if not audio:
             return (None, None)
 
-        return ("mp3", audio)
+        return (request.audio_format, audio)
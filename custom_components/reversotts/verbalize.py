@@ -0,0 +1,214 @@
+"""Number and date verbalization for Reverso TTS integration.
+
+Supporta italiano e inglese; per le altre lingue il testo resta invariato.
+"""
+from __future__ import annotations
+
+import re
+from typing import Callable, Dict, Optional
+
+_IT_UNITS = (
+    "zero", "uno", "due", "tre", "quattro", "cinque", "sei", "sette", "otto",
+    "nove", "dieci", "undici", "dodici", "tredici", "quattordici", "quindici",
+    "sedici", "diciassette", "diciotto", "diciannove",
+)
+_IT_TENS = (
+    "", "", "venti", "trenta", "quaranta", "cinquanta", "sessanta", "settanta",
+    "ottanta", "novanta",
+)
+_IT_MONTHS = (
+    "gennaio", "febbraio", "marzo", "aprile", "maggio", "giugno", "luglio",
+    "agosto", "settembre", "ottobre", "novembre", "dicembre",
+)
+
+_EN_UNITS = (
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight",
+    "nine", "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen",
+    "sixteen", "seventeen", "eighteen", "nineteen",
+)
+_EN_TENS = (
+    "", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty",
+    "ninety",
+)
+_EN_MONTHS = (
+    "January", "February", "March", "April", "May", "June", "July", "August",
+    "September", "October", "November", "December",
+)
+
+# Numeri fino a 999.999.999, con decimali opzionali (punto o virgola)
+_NUMBER_RE = re.compile(r"(?<![\w.,])(-?)(\d{1,9})(?:[.,](\d+))?(?![\w]|[.,]\d)")
+_ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+
+
+def _it_below_thousand(n: int) -> str:
+    hundreds, rest = divmod(n, 100)
+    words = ""
+    if hundreds:
+        words = "cento" if hundreds == 1 else _IT_UNITS[hundreds] + "cento"
+    if rest < 20:
+        return words + (_IT_UNITS[rest] if rest else "")
+    tens, unit = divmod(rest, 10)
+    tens_word = _IT_TENS[tens]
+    if unit in (1, 8):
+        # ventuno, ventotto: la vocale finale cade
+        tens_word = tens_word[:-1]
+    unit_word = "tré" if unit == 3 else (_IT_UNITS[unit] if unit else "")
+    return words + tens_word + unit_word
+
+
+def _it_number(n: int) -> str:
+    if n == 0:
+        return "zero"
+    millions, rest = divmod(n, 1_000_000)
+    thousands, units = divmod(rest, 1000)
+    parts = []
+    if millions:
+        parts.append("un milione" if millions == 1 else f"{_it_below_thousand(millions)} milioni")
+    # Migliaia e unità si scrivono attaccate: duemilaventisei, milleuno
+    below_million = ""
+    if thousands:
+        below_million = "mille" if thousands == 1 else f"{_it_below_thousand(thousands)}mila"
+    if units:
+        below_million += _it_below_thousand(units)
+    if below_million:
+        parts.append(below_million)
+    return " ".join(parts)
+
+
+def _en_below_thousand(n: int) -> str:
+    hundreds, rest = divmod(n, 100)
+    parts = []
+    if hundreds:
+        parts.append(f"{_EN_UNITS[hundreds]} hundred")
+    if rest:
+        if rest < 20:
+            parts.append(_EN_UNITS[rest])
+        else:
+            tens, unit = divmod(rest, 10)
+            parts.append(_EN_TENS[tens] + (f"-{_EN_UNITS[unit]}" if unit else ""))
+    return " ".join(parts)
+
+
+def _en_number(n: int) -> str:
+    if n == 0:
+        return "zero"
+    millions, rest = divmod(n, 1_000_000)
+    thousands, units = divmod(rest, 1000)
+    parts = []
+    if millions:
+        parts.append(f"{_en_below_thousand(millions)} million")
+    if thousands:
+        parts.append(f"{_en_below_thousand(thousands)} thousand")
+    if units:
+        parts.append(_en_below_thousand(units))
+    return " ".join(parts)
+
+
+_EN_ORDINAL_IRREGULAR = {
+    "one": "first", "two": "second", "three": "third", "five": "fifth",
+    "eight": "eighth", "nine": "ninth", "twelve": "twelfth",
+}
+
+
+def _en_ordinal(n: int) -> str:
+    words = _en_number(n)
+    head, sep, last = words.rpartition("-") if "-" in words else ("", "", words)
+    if last in _EN_ORDINAL_IRREGULAR:
+        last = _EN_ORDINAL_IRREGULAR[last]
+    elif last.endswith("y"):
+        last = last[:-1] + "ieth"
+    else:
+        last += "th"
+    return head + sep + last
+
+
+def _it_time(hours: int, minutes: int) -> str:
+    # 10:00 → "dieci", 10:30 → "dieci e trenta", 0:15 → "zero e quindici"
+    words = _it_number(hours)
+    return f"{words} e {_it_number(minutes)}" if minutes else words
+
+
+def _en_time(hours: int, minutes: int) -> str:
+    # 10:00 → "ten o'clock", 12:30 → "twelve thirty", 7:05 → "seven oh five"
+    words = _en_number(hours)
+    if not minutes:
+        return f"{words} o'clock"
+    if minutes < 10:
+        return f"{words} oh {_en_number(minutes)}"
+    return f"{words} {_en_number(minutes)}"
+
+
+_LANGUAGES: Dict[str, Dict[str, object]] = {
+    "it": {
+        "number": _it_number, "minus": "meno", "point": "virgola",
+        "thousands": ".", "months": _IT_MONTHS, "time": _it_time,
+        "time_separators": ":.",
+    },
+    "en": {
+        "number": _en_number, "minus": "minus", "point": "point",
+        "thousands": ",", "months": _EN_MONTHS, "time": _en_time,
+        "time_separators": ":",
+    },
+}
+
+# Orari HH:MM, letti prima dei numeri: "10:30" non è "dieci:trenta". In
+# italiano anche H.MM ("Sono le 10.30"): i decimali si scrivono con la virgola
+_TIME_RE = {
+    seps: re.compile(
+        rf"(?<![\w.,:])([01]?\d|2[0-3])[{re.escape(seps)}]([0-5]\d)(?![\w]|[.,:]\d)"
+    )
+    for seps in (":", ":.")
+}
+
+# Numeri con separatore delle migliaia: 1.000 (it), 1,000 (en)
+_GROUPED_RE = {
+    sep: re.compile(rf"(?<![\d.,])\d{{1,3}}(?:{re.escape(sep)}\d{{3}})+(?!\d|[.,]\d)")
+    for sep in (".", ",")
+}
+
+
+def _spell_number(rules: Dict[str, object], sign: str, integer: str, decimals: Optional[str]) -> str:
+    number: Callable[[int], str] = rules["number"]  # type: ignore[assignment]
+    words = number(int(integer))
+    if decimals and len(decimals) > 2:
+        # Più di due decimali cifra per cifra: 3,14159 → "tre virgola uno quattro uno ..."
+        words = f"{words} {rules['point']} {' '.join(number(int(d)) for d in decimals)}"
+    elif decimals:
+        # Uno o due decimali come numero, zeri iniziali a parte:
+        # 21,25 → "ventuno virgola venticinque", 21,05 → "ventuno virgola zero cinque"
+        stripped = decimals.lstrip("0")
+        spoken = ["zero"] * (len(decimals) - len(stripped))
+        if stripped:
+            spoken.append(number(int(stripped)))
+        words = f"{words} {rules['point']} {' '.join(spoken)}"
+    if sign:
+        words = f"{rules['minus']} {words}"
+    return words
+
+
+def verbalize(text: str, language: Optional[str]) -> str:
+    """Scrive in lettere numeri, orari e date ISO per la lingua indicata (es. ``it-IT``)."""
+    rules = _LANGUAGES.get((language or "").split("-")[0].lower())
+    if rules is None:
+        return text
+
+    months = rules["months"]
+
+    def _date(match: re.Match) -> str:
+        year, month, day = int(match[1]), int(match[2]), int(match[3])
+        if not 1 <= month <= 12 or not 1 <= day <= 31:
+            return match[0]
+        if rules is _LANGUAGES["it"]:
+            day_word = "primo" if day == 1 else _it_number(day)
+            return f"{day_word} {months[month - 1]} {_it_number(year)}"
+        return f"{months[month - 1]} {_en_ordinal(day)}, {_en_number(year)}"
+
+    text = _ISO_DATE_RE.sub(_date, text)
+    time_words: Callable[[int, int], str] = rules["time"]  # type: ignore[assignment]
+    time_re = _TIME_RE[rules["time_separators"]]
+    text = time_re.sub(lambda m: time_words(int(m[1]), int(m[2])), text)
+    sep = rules["thousands"]
+    text = _GROUPED_RE[sep].sub(lambda m: m[0].replace(sep, ""), text)
+    return _NUMBER_RE.sub(
+        lambda m: _spell_number(rules, m[1], m[2], m[3]), text
+    )
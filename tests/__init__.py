@@ -0,0 +1 @@
+"""Tests for the Reverso TTS integration."""
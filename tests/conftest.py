@@ -0,0 +1,22 @@
+"""Shared setup for the Reverso TTS tests."""
+from __future__ import annotations
+
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "custom_components.reversotts"
+
+sys.path.insert(0, ROOT)
+
+try:
+    import homeassistant  # noqa: F401
+except ImportError:
+    # Senza Home Assistant si testano solo i moduli puri (cache, testo,
+    # catalogo, ...): il package viene registrato senza eseguire __init__.py,
+    # che importa homeassistant.
+    for name in ("custom_components", PACKAGE):
+        module = types.ModuleType(name)
+        module.__path__ = [os.path.join(ROOT, *name.split("."))]
+        sys.modules.setdefault(name, module)
@@ -0,0 +1,46 @@
+"""Tests for the MP3 frame helpers."""
+from __future__ import annotations
+
+from custom_components.reversotts.audio import concat_mp3, strip_tags
+
+# MPEG 1 Layer III, 128 kbps, 44.1 kHz, senza padding: 417 byte per frame
+HEADER = b"\xff\xfb\x90\x00"
+FRAME_LENGTH = 417
+
+
+def _frame(fill: int) -> bytes:
+    return HEADER + bytes([fill]) * (FRAME_LENGTH - len(HEADER))
+
+
+def _xing_frame() -> bytes:
+    # Tag Xing dopo le side information (32 byte in stereo)
+    body = bytes(32) + b"Xing" + bytes(FRAME_LENGTH - len(HEADER) - 36)
+    return HEADER + body
+
+
+def _id3v2(size: int = 20) -> bytes:
+    synchsafe = bytes([(size >> shift) & 0x7F for shift in (21, 14, 7, 0)])
+    return b"ID3\x03\x00\x00" + synchsafe + b"\x00" * size
+
+
+def _clip(*fills: int) -> bytes:
+    return _id3v2() + _xing_frame() + b"".join(_frame(fill) for fill in fills) + b"TAG" + bytes(125)
+
+
+def test_strip_tags_keeps_only_audio_frames():
+    assert strip_tags(_clip(1, 2)) == _frame(1) + _frame(2)
+
+
+def test_strip_tags_leaves_plain_frames_alone():
+    frames = _frame(1) + _frame(2)
+    assert strip_tags(frames) == frames
+
+
+def test_strip_tags_returns_non_mp3_data_unchanged():
+    assert strip_tags(b"not an mp3") == b"not an mp3"
+
+
+def test_concat_mp3_joins_frames_in_order():
+    joined = concat_mp3([_clip(1), _clip(2, 3), _frame(4)])
+    assert joined == b"".join(_frame(fill) for fill in (1, 2, 3, 4))
+    assert len(joined) % FRAME_LENGTH == 0
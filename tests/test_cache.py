@@ -0,0 +1,241 @@
+"""Tests for the RAM and disk cache layers."""
+from __future__ import annotations
+
+import os
+import sqlite3
+
+import pytest
+
+from custom_components.reversotts.cache import (
+    LAYOUT_BLOBS,
+    DiskCache,
+    MemoryCache,
+    content_hash,
+    normalize_speed,
+)
+
+AUDIO_A = b"A" * 1000
+AUDIO_B = b"B" * 2000
+
+
+def _key(i: int) -> str:
+    # Stessa forma delle chiavi reali: 40 caratteri esadecimali
+    return f"{i:040x}"
+
+
+def _files(root: str) -> list:
+    found = []
+    for path, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d != ".tmp"]
+        found += [os.path.relpath(os.path.join(path, name), root) for name in files]
+    return sorted(found)
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "cache"), str(tmp_path / "index.db")
+
+
+@pytest.fixture
+def cache(paths):
+    disk = DiskCache(*paths)
+    disk.migrate_layout()
+    yield disk
+    disk.close()
+
+
+def _blob_refs(index_path: str) -> dict:
+    with sqlite3.connect(index_path) as db:
+        return dict(db.execute("SELECT hash, refs FROM blobs"))
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [("1.5", 1.5), ("0,8", 0.8), (2, 2.0), ("", 1.2), (None, 1.2), ("veloce", 1.2), ("3", 1.0)],
+)
+def test_normalize_speed(value, expected):
+    assert normalize_speed(value, 1.2) == expected
+
+
+# ---------------------------------------------------------------------------
+# DiskCache: blob condivisi e conteggio dei riferimenti
+# ---------------------------------------------------------------------------
+
+def test_identical_audio_is_stored_once(cache, paths):
+    first = cache.put(_key(1), AUDIO_A)
+    second = cache.put(_key(2), AUDIO_A)
+
+    assert first == second
+    assert _files(paths[0]) == [first]
+    assert _blob_refs(paths[1]) == {content_hash(AUDIO_A): 2}
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] == len(AUDIO_A)
+    assert stats["dedup_saved_bytes"] == len(AUDIO_A)
+
+
+def test_blob_removed_with_last_reference(cache, paths):
+    relpath = cache.put(_key(1), AUDIO_A)
+    cache.put(_key(2), AUDIO_A)
+
+    cache._remove([_key(1)])
+    assert cache.get(_key(2)) == AUDIO_A
+    assert _files(paths[0]) == [relpath]
+
+    cache._remove([_key(2)])
+    assert _files(paths[0]) == []
+    assert _blob_refs(paths[1]) == {}
+    assert cache.stats()["bytes"] == 0
+
+
+def test_rewrite_key_releases_old_blob(cache, paths):
+    cache.put(_key(1), AUDIO_A)
+    relpath = cache.put(_key(1), AUDIO_B)
+
+    assert _files(paths[0]) == [relpath]
+    assert cache.get(_key(1)) == AUDIO_B
+    assert cache.stats()["bytes"] == len(AUDIO_B)
+
+
+def test_eviction_counts_shared_blob_once(cache):
+    cache.put(_key(1), AUDIO_B)
+    for i in range(2, 5):
+        cache.put(_key(i), AUDIO_A)
+    assert cache.stats()["bytes"] == len(AUDIO_A) + len(AUDIO_B)
+
+    # Il blob condiviso libera spazio solo quando escono tutte le sue chiavi
+    cache.configure(max_bytes=len(AUDIO_A) + 500)
+    assert cache.evict_to_size(len(AUDIO_A) + 500) == 1
+    assert cache.get(_key(1)) is None
+    assert all(cache.get(_key(i)) == AUDIO_A for i in range(2, 5))
+    assert cache.stats()["bytes"] == len(AUDIO_A)
+
+
+def test_missing_blob_file_realigns_index(cache, paths):
+    relpath = cache.put(_key(1), AUDIO_A)
+    os.remove(os.path.join(paths[0], relpath))
+
+    assert cache.get(_key(1)) is None
+    assert not cache.contains(_key(1))
+    assert cache.stats()["bytes"] == 0
+
+
+def test_totals_survive_reopen(cache, paths):
+    cache.put(_key(1), AUDIO_A)
+    cache.put(_key(2), AUDIO_A)
+    cache.put(_key(3), AUDIO_B)
+    cache.close()
+
+    reopened = DiskCache(*paths)
+    try:
+        assert not reopened.needs_migration
+        assert reopened.stats()["bytes"] == len(AUDIO_A) + len(AUDIO_B)
+        assert reopened.get(_key(2)) == AUDIO_A
+    finally:
+        reopened.close()
+
+
+def test_touch_many_updates_hits(cache):
+    cache.put(_key(1), AUDIO_A)
+    cache.touch_many({_key(1): 20, _key(9): 1})
+    cache.locate(_key(1))
+
+    assert cache.most_used(5) == [_key(1)]
+    with cache._lock:
+        hits = cache._db.execute(
+            "SELECT hits FROM entries WHERE key = ?", (_key(1),)
+        ).fetchone()[0]
+    assert hits == 21
+
+
+# ---------------------------------------------------------------------------
+# DiskCache: migrazione dei layout 0 → 1 → 2
+# ---------------------------------------------------------------------------
+
+def test_migration_from_flat_layout(paths):
+    cache_path, index_path = paths
+    os.makedirs(cache_path)
+    for i, audio in ((1, AUDIO_A), (2, AUDIO_A), (3, AUDIO_B)):
+        with open(os.path.join(cache_path, f"{_key(i)}.mp3"), "wb") as f:
+            f.write(audio)
+
+    disk = DiskCache(cache_path, index_path)
+    try:
+        assert disk.needs_migration
+        assert disk.stats()["bytes"] == 2 * len(AUDIO_A) + len(AUDIO_B)
+
+        # Letta prima della migrazione: spostata al volo nella sottocartella
+        assert disk.get(_key(1)) == AUDIO_A
+
+        disk.migrate_layout()
+        assert not disk.needs_migration
+        with sqlite3.connect(index_path) as db:
+            assert db.execute("PRAGMA user_version").fetchone()[0] == LAYOUT_BLOBS
+
+        assert [disk.get(_key(i)) for i in (1, 2, 3)] == [AUDIO_A, AUDIO_A, AUDIO_B]
+        assert disk.locate(_key(1)) == disk.locate(_key(2))
+        assert _files(cache_path) == sorted(
+            disk.relpath(content_hash(audio)) for audio in (AUDIO_A, AUDIO_B)
+        )
+        assert disk.stats()["bytes"] == len(AUDIO_A) + len(AUDIO_B)
+    finally:
+        disk.close()
+
+
+def test_migration_from_sharded_layout(paths):
+    cache_path, index_path = paths
+    disk = DiskCache(cache_path, index_path)
+    disk._set_layout(1)
+    # File con il nome della chiave, come prima dei blob
+    for i, audio in ((1, AUDIO_A), (2, AUDIO_A)):
+        path = disk.path_for(_key(i))
+        disk._ensure_shard(path)
+        with open(path, "wb") as f:
+            f.write(audio)
+    disk.close()
+    os.remove(index_path)
+
+    # Indice ricreato: i file esistenti vengono indicizzati e convertiti
+    disk = DiskCache(cache_path, index_path)
+    try:
+        assert disk.stats()["entries"] == 2
+        disk.migrate_layout()
+        assert _files(cache_path) == [disk.relpath(content_hash(AUDIO_A))]
+        assert _blob_refs(index_path) == {content_hash(AUDIO_A): 2}
+        assert disk.get(_key(2)) == AUDIO_A
+    finally:
+        disk.close()
+
+
+# ---------------------------------------------------------------------------
+# MemoryCache
+# ---------------------------------------------------------------------------
+
+def test_memory_cache_shares_identical_audio():
+    memory = MemoryCache(10_000)
+    memory.put("a", AUDIO_A)
+    memory.put("b", AUDIO_A)
+    memory.put("c", AUDIO_B)
+
+    stats = memory.stats()
+    assert stats["entries"] == 3
+    assert stats["blobs"] == 2
+
+    memory.pop("a")
+    assert memory.get("b") == AUDIO_A
+    memory.pop("b")
+    assert memory.stats()["blobs"] == 1
+
+
+def test_memory_cache_stays_within_budget():
+    memory = MemoryCache(5000)
+    for i in range(10):
+        memory.put(str(i), bytes([i]) * 1000)
+
+    assert memory.size <= memory.max_bytes
+    assert memory.get("9") is not None
+    assert memory.get("0") is None
+
+    memory.configure(2500)
+    assert memory.size <= 2500
+    assert memory.get("9") is not None
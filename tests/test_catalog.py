@@ -0,0 +1,81 @@
+"""Tests for the voice catalog."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.reversotts.catalog import (
+    GENDER_MALE,
+    QUALITY_NEURAL,
+    SUPPORT_LANGUAGES,
+    VOICE_INFO,
+    default_voice,
+    match_language,
+    resolve_voice,
+    select_voice,
+)
+from custom_components.reversotts.const import DEFAULT_VOICE_ID
+
+
+def test_catalog_parses_voice_ids():
+    assert VOICE_INFO["Vittorio22k_HQ"].language == "it-IT"
+    assert VOICE_INFO["Vittorio22k_HQ"].gender == GENDER_MALE
+    assert VOICE_INFO["Margaux-BE22k_NT"].language == "fr-BE"
+    neural = VOICE_INFO["en-US-AndrewMultilingualNeural"]
+    assert (neural.language, neural.quality, neural.name) == ("en-US", QUALITY_NEURAL, "Andrew")
+    assert "it-IT" in SUPPORT_LANGUAGES
+
+
+@pytest.mark.parametrize(
+    ("language", "expected"),
+    [("it-IT", "it-IT"), ("it_it", "it-IT"), ("it", "it-IT"), ("it-CH", "it-IT"),
+     ("xx-XX", None), (None, None)],
+)
+def test_match_language(language, expected):
+    assert match_language(language) == expected
+
+
+@pytest.mark.parametrize(
+    ("voice_id", "expected"),
+    [
+        ("Vittorio22k_HQ", "Vittorio22k_HQ"),
+        ("vittorio22k_hq", "Vittorio22k_HQ"),
+        # Senza suffisso vince la qualità NT
+        ("Vittorio22k", "Vittorio22k_NT"),
+        (" Chiara22k_NT ", "Chiara22k_NT"),
+        # Errore di battitura
+        ("Vitorio22k_HQ", "Vittorio22k_HQ"),
+        ("Nessuno22k_NT", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_resolve_voice(voice_id, expected):
+    assert resolve_voice(voice_id) == expected
+
+
+def test_default_voice_prefers_configured_defaults():
+    assert default_voice("it-IT") == "Vittorio22k_NT"
+    assert default_voice("en") == "Ryan22k_NT"
+    assert default_voice("xx") is None
+
+
+@pytest.mark.parametrize(
+    ("language", "requested", "configured", "expected"),
+    [
+        # La voce richiesta vince sempre, se esiste
+        ("en-US", "chiara22k_nt", "Ryan22k_NT", "Chiara22k_NT"),
+        # Voce configurata della lingua richiesta
+        ("it-IT", None, "Chiara22k_HQ", "Chiara22k_HQ"),
+        # Voce configurata di un'altra lingua: default della lingua
+        ("en-US", None, "Chiara22k_HQ", "Ryan22k_NT"),
+        # Voce richiesta sconosciuta: si prosegue con le altre regole
+        ("it-IT", "Nessuno22k_NT", None, "Vittorio22k_NT"),
+        # Nessuna lingua: voce configurata, poi default interno
+        (None, None, "Chiara22k_HQ", "Chiara22k_HQ"),
+        (None, None, None, DEFAULT_VOICE_ID),
+        # Lingua fuori catalogo
+        ("xx-XX", None, "Chiara22k_HQ", "Chiara22k_HQ"),
+    ],
+)
+def test_select_voice(language, requested, configured, expected):
+    assert select_voice(language, requested, configured) == expected
@@ -0,0 +1,42 @@
+"""Tests for offline language detection."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.reversotts.langdetect import detect_language
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("La lavatrice ha finito, ricordati di stendere i panni", "it-IT"),
+        ("The washing machine is done, please hang the laundry", "en-US"),
+        ("La machine à laver est terminée, pensez à étendre le linge", "fr-FR"),
+        ("La lavadora ha terminado, recuerda tender la ropa", "es-ES"),
+        ("Die Waschmaschine ist fertig, bitte die Wäsche aufhängen", "de-DE"),
+    ],
+)
+def test_detects_household_announcements(text, expected):
+    assert detect_language(text) == expected
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("Добро пожаловать домой", "ru-RU"),
+        ("Καλώς ήρθατε", "el-GR"),
+        ("おかえりなさい", "ja-JP"),
+    ],
+)
+def test_detects_language_from_script(text, expected):
+    assert detect_language(text) == expected
+
+
+@pytest.mark.parametrize("text", ["Ciao", "OK 123", "", "22:30 - 21,5 °C"])
+def test_short_or_ambiguous_text_is_uncertain(text):
+    assert detect_language(text) is None
+
+
+def test_detection_ignores_case_and_punctuation():
+    text = "Qualcuno ha suonato il campanello alla porta"
+    assert detect_language(text.upper() + "!!!") == detect_language(text) == "it-IT"
@@ -0,0 +1,138 @@
+"""Tests for the upstream rate limiter and circuit breaker."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from custom_components.reversotts import ratelimit
+from custom_components.reversotts.ratelimit import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    TokenBucket,
+)
+
+
+class FakeClock:
+    """Orologio manuale: ``sleep`` fa solo avanzare il tempo."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit, "time", clock)
+    monkeypatch.setattr(ratelimit.asyncio, "sleep", clock.sleep)
+    # Jitter disattivato: sempre l'attesa massima
+    monkeypatch.setattr(ratelimit.random, "uniform", lambda low, high: high)
+    return clock
+
+
+# ---------------------------------------------------------------------------
+# TokenBucket
+# ---------------------------------------------------------------------------
+
+def test_bucket_allows_burst_then_paces(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+
+    async def _acquire(count: int) -> None:
+        for _ in range(count):
+            await bucket.acquire()
+
+    asyncio.run(_acquire(3))
+    assert clock.sleeps == []
+
+    asyncio.run(_acquire(2))
+    assert clock.sleeps == [pytest.approx(0.5), pytest.approx(0.5)]
+    assert clock.now == pytest.approx(1001.0)
+
+
+def test_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1.0, capacity=2)
+
+    async def _acquire(count: int) -> None:
+        for _ in range(count):
+            await bucket.acquire()
+
+    asyncio.run(_acquire(2))
+    clock.now += 60
+    asyncio.run(_acquire(2))
+    assert clock.sleeps == []
+    asyncio.run(_acquire(1))
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+# ---------------------------------------------------------------------------
+# CircuitBreaker
+# ---------------------------------------------------------------------------
+
+def test_breaker_opens_and_doubles_delay(clock):
+    breaker = CircuitBreaker(base_delay=10, max_delay=100)
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow()
+    assert breaker.retry_in == pytest.approx(10)
+
+    clock.now += 10
+    assert breaker.allow()
+    assert breaker.state == STATE_HALF_OPEN
+    # Una sola richiesta di prova alla volta
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.retry_in == pytest.approx(20)
+
+    for _ in range(5):
+        breaker.record_failure()
+    assert breaker.retry_in == pytest.approx(100)
+
+
+def test_breaker_closes_after_successful_probe(clock):
+    breaker = CircuitBreaker(base_delay=10, max_delay=100)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow() and breaker.allow()
+
+    # Il conteggio riparte: il prossimo errore riapre con l'attesa base
+    breaker.record_failure()
+    assert breaker.retry_in == pytest.approx(10)
+
+
+def test_breaker_respects_retry_after(clock):
+    breaker = CircuitBreaker(base_delay=10, max_delay=100)
+    breaker.record_failure(min_delay=60)
+    assert breaker.retry_in == pytest.approx(60)
+
+    breaker.record_success()
+    breaker.record_failure(min_delay=600)
+    assert breaker.retry_in == pytest.approx(100)
+
+
+def test_breaker_released_probe_can_retry(clock):
+    breaker = CircuitBreaker(base_delay=10, max_delay=100)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+
+    # Prova interrotta senza esito: il circuito resta aperto ma riprovabile
+    breaker.release_probe()
+    assert breaker.state == STATE_OPEN
+    assert breaker.allow()
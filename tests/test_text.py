@@ -0,0 +1,139 @@
+"""Tests for text normalization and verbalization."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.reversotts.text import (
+    TextNormalizer,
+    render_template,
+    split_template,
+    split_text,
+)
+from custom_components.reversotts.verbalize import verbalize
+
+SAMPLES = [
+    "Sono le 10.30",
+    "Fa 21.0 gradi, costa 3,00 euro",
+    "  Ciao   “mondo” – tutto ok?!  ",
+    "Home Assistant 2024.10",
+    "Allarme!!! Porta aperta .",
+    "Temperatura 21,5 gradi alle 12:30 del 2026-03-01",
+]
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_builtin_steps_are_idempotent(text):
+    normalizer = TextNormalizer()
+    once = normalizer(text)
+    assert normalizer(once) == once
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_verbalization_is_idempotent(text):
+    normalizer = TextNormalizer(verbalize_numbers=True, language="it-IT")
+    once = normalizer(text)
+    assert normalizer(once) == once
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("Fa 21.0 gradi", "Fa 21 gradi"),
+        ("costa 3,00 euro", "costa 3 euro"),
+        ("Sono le 10.30", "Sono le 10.30"),
+        ("treno delle 7.50", "treno delle 7.50"),
+        ("ore 10.00", "ore 10.00"),
+        ("Home Assistant 2024.10", "Home Assistant 2024.10"),
+        ("1.000 euro", "1.000 euro"),
+    ],
+)
+def test_only_zero_decimals_are_dropped(text, expected):
+    assert TextNormalizer()(text) == expected
+
+
+def test_substitutions_are_case_sensitive():
+    normalizer = TextNormalizer({"HA": "Home Assistant"})
+    assert normalizer("La lavatrice ha finito, HA dice ok") == (
+        "La lavatrice ha finito, Home Assistant dice ok"
+    )
+
+
+def test_substitutions_match_whole_words():
+    normalizer = TextNormalizer({"tv": "la tv", "°C": "gradi"})
+    assert normalizer("Accendi tv, fuori 5 °C") == "Accendi la tv, fuori 5 gradi"
+    assert normalizer("tvb") == "tvb"
+
+
+@pytest.mark.parametrize(
+    ("text", "language", "expected"),
+    [
+        ("ore 10:00", "it-IT", "ore dieci"),
+        ("alle 12:30", "it-IT", "alle dodici e trenta"),
+        ("12:30", "en-US", "twelve thirty"),
+        ("7:05 and 10:00", "en-US", "seven oh five and ten o'clock"),
+        ("Sono le 10.30", "it-IT", "Sono le dieci e trenta"),
+        ("treno delle 7.50", "it-IT", "treno delle sette e cinquanta"),
+        ("21,5 gradi", "it-IT", "ventuno virgola cinque gradi"),
+        ("21,05 euro", "it-IT", "ventuno virgola zero cinque euro"),
+        ("3,14159", "it-IT", "tre virgola uno quattro uno cinque nove"),
+        ("2.5 and 3.14159", "en-US", "two point five and three point one four one five nine"),
+        ("1.000 euro", "it-IT", "mille euro"),
+        ("2026-03-01", "it-IT", "primo marzo duemilaventisei"),
+        ("10:30", "fr-FR", "10:30"),
+    ],
+)
+def test_verbalize(text, language, expected):
+    assert verbalize(text, language) == expected
+
+
+def test_split_template():
+    assert split_template("Lavatrice finita in {minuti} minuti", {"minuti": 42}) == [
+        "Lavatrice finita in", "42", "minuti",
+    ]
+    with pytest.raises(ValueError):
+        split_template("Ciao {nome}", {})
+
+
+@pytest.mark.parametrize(
+    ("template", "expected"),
+    [
+        ("{x}.", ["Anna."]),
+        ("{x}!", ["Anna!"]),
+        ("Benvenuto {x}.", ["Benvenuto", "Anna."]),
+        ("{x}, la cena è pronta", ["Anna,", "la cena è pronta"]),
+        ('"{x}" è arrivata', ["Anna", '" è arrivata']),
+    ],
+)
+def test_split_template_has_no_punctuation_only_fragments(template, expected):
+    assert split_template(template, {"x": "Anna"}) == expected
+
+
+@pytest.mark.parametrize("template", ["{x}.", "{x}!", "Ciao {x}!", "Benvenuto {x}, entra pure."])
+def test_render_template_matches_plain_message(template):
+    # La clip unita dai frammenti ha la stessa chiave del messaggio composto
+    assert render_template(template, {"x": "Anna"}) == template.replace("{x}", "Anna")
+    with pytest.raises(ValueError):
+        render_template(template, {})
+
+
+def test_split_text_keeps_short_text_whole():
+    assert split_text("  Ciao a tutti  ") == ["Ciao a tutti"]
+    assert split_text("   ") == []
+
+
+def test_split_text_prefers_sentence_boundaries():
+    text = "Prima frase qui. Seconda frase qui! Terza frase qui?"
+    assert split_text(text, 35) == ["Prima frase qui. Seconda frase qui!", "Terza frase qui?"]
+
+
+def test_split_text_falls_back_to_clauses_and_spaces():
+    assert split_text("uno, due, tre, quattro", 10) == ["uno, due,", "tre,", "quattro"]
+    assert split_text("alfa beta gamma delta", 11) == ["alfa beta", "gamma delta"]
+    assert split_text("a" * 25, 10) == ["a" * 10, "a" * 10, "a" * 5]
+
+
+def test_split_text_chunks_fit_and_keep_every_word():
+    text = " ".join(f"Frase numero {i}, con una virgola." for i in range(40))
+    chunks = split_text(text, 100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()